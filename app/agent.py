@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
-from dataclasses import dataclass
+import os
+import time
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
+from typing import Any, Optional
 
-from app.retry_utils import with_retry
-from app.script_gen import generate_script
-from app.seo import generate_metadata
+from app.audio import default_mix, mix_audio
+from app.cache import hash_file
+from app.encoding import Rendition, get_profile, prefix_length
+from app.jobs import run_encode
+from app.pipeline import CHECKPOINT_NAME, Checkpoint, ProgressCallback, Stage, run_stages
+from app.scene_render import load_scenes, narration_text, render_scene_video
+from app.scenes import parse_scenes
+from app.script_gen import generate_script, generate_script_package, stream_script
+from app.seo import generate_metadata, short_metadata
 from app.thumbnail import create_thumbnail
-from app.tts import synthesize_voice
-from app.video import create_video
+from app.tts import ChunkPrefetcher, synthesize_voice
+from app.utils import load_json, save_json
+from app.video import create_renditions
+from app.workspace import lock_workspace
 
 logger = logging.getLogger(__name__)
 
@@ -23,47 +36,218 @@ class AgentConfig:
     short_duration: int
     full_duration: int
     video_type: str
+    render_mode: str = "still"
 
 
-@with_retry(attempts=3, wait_seconds=2, backoff=2)
-def run_pipeline(topic: str, config: AgentConfig) -> dict[str, Path]:
-    logger.info("Starting pipeline for topic: %s", topic)
-    config.workdir.mkdir(parents=True, exist_ok=True)
-
-    script = generate_script(
-        topic=topic,
-        style=config.style,
-        language=config.language,
-        video_type=config.video_type,
-        short_duration=config.short_duration,
-        full_duration=config.full_duration,
-    )
-    script_path = config.workdir / "script.txt"
-    script_path.write_text(script, encoding="utf-8")
-    logger.info("Script generated at %s", script_path)
+# Settings that change what a stage produces; a run resumes only if all of them match the checkpoint
+_SETTINGS = (
+    "OPENAI_MODEL", "OPENAI_IMAGE_MODEL", "OPENAI_IMAGE_SIZE", "LLM_COMBINED", "TTS_CHUNK_CHARS",
+    "ENCODE_PROFILE", "STILL_FPS", "VIDEO_ENGINE", "SUBTITLE_MODE", "INTRO_SECONDS", "SCENE_DEFAULT_SECONDS",
+    "AUDIO_LOUDNESS_LUFS", "BGM_VOLUME", "SFX_VOLUME",
+)
+_INPUT_FILES = ("BGM_PATH", "FONT_PATH", "FONT_BOLD_PATH")
+
+
+def _input_digest(path: Path) -> Optional[str]:
+    if path.is_file():
+        return hash_file(path)
+    if path.is_dir():
+        return hashlib.sha256(
+            json.dumps({item.name: hash_file(item) for item in sorted(path.iterdir()) if item.is_file()}).encode()
+        ).hexdigest()
+    return None
+
+
+def _fingerprint(topic: str, config: AgentConfig) -> str:
+    settings = {name: os.getenv(name) for name in _SETTINGS}
+    # Input files are fingerprinted by content, so swapping the music or a font under the same path counts too
+    for name in (*_INPUT_FILES, "SFX_DIR"):
+        value = os.getenv(name)
+        settings[name] = [value, _input_digest(Path(value))] if value else None
+    payload = json.dumps({"topic": topic, **asdict(config), "settings": settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_stages(topic: str, config: AgentConfig, progress: Optional[ProgressCallback]) -> list[Stage]:
+    workdir = config.workdir
+    scenes_mode = config.render_mode == "scenes"
+
+    def encode_progress(fraction: float) -> None:
+        if progress:
+            progress({"type": "encode_progress", "percent": round(fraction * 100, 1)})
+
+    script_args = {
+        "topic": topic,
+        "style": config.style,
+        "language": config.language,
+        "video_type": config.video_type,
+        "short_duration": config.short_duration,
+        "full_duration": config.full_duration,
+        "scene_format": scenes_mode,
+    }
+    combined = os.getenv("LLM_COMBINED", "0") == "1"
+    combined_metadata: dict[str, str] = {}
+    streaming = not combined and os.getenv("SCRIPT_STREAMING", "1") != "0"
+    prefetcher = ChunkPrefetcher(config.language, config.voice) if streaming else None
+    # Chunks prefetched while the script streams, or synthesized by the audio stage, are handed on to the
+    # narration and scene renders directly instead of being synthesized (or read from the cache) again
+    tts_chunks: dict[str, bytes] = {}
 
-    audio_path = config.workdir / "narration.mp3"
-    synthesize_voice(script, audio_path, language=config.language, voice=config.voice)
-    logger.info("Audio generated at %s", audio_path)
+    def stream_with_prefetch() -> str:
+        sections = []
+        for section in stream_script(**script_args):
+            sections.append(section)
+            if scenes_mode:
+                section = narration_text(parse_scenes(section, default_duration_s=0))
+            if section:
+                prefetcher.submit(section)
+        return "\n\n".join(sections)
 
-    thumbnail_path = config.workdir / "thumbnail.png"
-    create_thumbnail(topic, thumbnail_path)
-    logger.info("Thumbnail generated at %s", thumbnail_path)
+    def script_stage(_: dict[str, Any]) -> Path:
+        script = None
+        if combined:
+            script, combined_metadata["json"] = generate_script_package(**script_args)
+        elif prefetcher:
+            try:
+                script = stream_with_prefetch()
+            except Exception as exc:
+                logger.warning("Streaming script generation failed, retrying without streaming: %s", exc)
+        if script is None:
+            script = generate_script(**script_args)
+        script_path = workdir / "script.txt"
+        script_path.write_text(script, encoding="utf-8")
+        logger.info("Script generated at %s", script_path)
+        return script_path
 
-    video_path = config.workdir / "video.mp4"
-    create_video(audio_path, thumbnail_path, video_path)
-    logger.info("Video generated at %s", video_path)
+    def audio_stage(inputs: dict[str, Any]) -> Path:
+        if prefetcher:
+            tts_chunks.update(prefetcher.wait())
+        script = inputs["script"].read_text(encoding="utf-8")
+        if scenes_mode:
+            script = narration_text(load_scenes(script, topic))
+        audio_path = workdir / "narration.mp3"
+        timings = synthesize_voice(
+            script, audio_path, language=config.language, voice=config.voice, progress=progress, store=tts_chunks
+        )
+        save_json(
+            workdir / "narration_timings.json",
+            {"chunks": [{"text": text, "seconds": seconds} for text, seconds in timings]},
+        )
+        logger.info("Audio generated at %s", audio_path)
+        return audio_path
 
-    metadata = generate_metadata(topic, script)
-    metadata_path = config.workdir / "metadata.json"
-    metadata_path.write_text(metadata, encoding="utf-8")
-    logger.info("Metadata generated at %s", metadata_path)
+    def thumbnail_stage(_: dict[str, Any]) -> Path:
+        thumbnail_path = workdir / "thumbnail.png"
+        create_thumbnail(topic, thumbnail_path)
+        logger.info("Thumbnail generated at %s", thumbnail_path)
+        return thumbnail_path
+
+    profile = get_profile("short_vertical" if config.video_type.lower() == "short" else None)
+    # "Auto" derives a vertical Short from the full cut's narration and images instead of generating a second video
+    auto = config.video_type.lower() == "auto"
+    short_seconds = config.short_duration * 60
+
+    def short_cut(audio_path: Path) -> float:
+        # Cut at a TTS chunk boundary so the Short ends on a complete sentence
+        timings = load_json(audio_path.with_name("narration_timings.json")).get("chunks", [])
+        durations = [chunk["seconds"] for chunk in timings]
+        if not durations:
+            return short_seconds
+        return min(sum(durations[:prefix_length(durations, short_seconds)]), short_seconds)
+
+    def video_stage(inputs: dict[str, Any]) -> Path:
+        video_path = workdir / "video.mp4"
+        short = Rendition(get_profile("short_vertical"), workdir / "short.mp4", short_seconds) if auto else None
+        if scenes_mode:
+            render_scene_video(
+                inputs["script"].read_text(encoding="utf-8"),
+                topic,
+                workdir,
+                video_path,
+                language=config.language,
+                voice=config.voice,
+                profile=profile,
+                short=short,
+                tts_chunks=tts_chunks,
+                progress=encode_progress,
+            )
+        else:
+            renditions = [Rendition(profile, video_path)]
+            if short:
+                renditions.append(replace(short, max_seconds=short_cut(inputs["audio"])))
+            audio_path = inputs["audio"]
+            mix = default_mix()
+            if mix.active:
+                # Mixed and normalized once; both renditions then stream-copy the same AAC track
+                audio_path = mix_audio(audio_path, workdir / "narration_mix.m4a", mix)
+            if os.getenv("VIDEO_ENGINE", "ffmpeg") == "ffmpeg":
+                # ffmpeg already encodes out of process, so it runs here and can report progress
+                create_renditions(audio_path, inputs["thumbnail"], renditions, progress=encode_progress)
+            else:
+                run_encode(create_renditions, audio_path, inputs["thumbnail"], renditions)
+        logger.info("Video generated at %s", video_path)
+        return video_path
+
+    def metadata_stage(inputs: dict[str, Any]) -> Path:
+        if "json" in combined_metadata:
+            metadata = combined_metadata["json"]
+        else:
+            metadata = generate_metadata(topic, inputs["script"].read_text(encoding="utf-8"))
+        metadata_path = workdir / "metadata.json"
+        metadata_path.write_text(metadata, encoding="utf-8")
+        if auto:
+            metadata_path.with_name("short_metadata.json").write_text(short_metadata(metadata), encoding="utf-8")
+        logger.info("Metadata generated at %s", metadata_path)
+        return metadata_path
+
+    return [
+        Stage("script", script_stage),
+        Stage("audio", audio_stage, deps=("script",)),
+        Stage("thumbnail", thumbnail_stage),
+        Stage("video", video_stage, deps=("script", "audio", "thumbnail")),
+        Stage("metadata", metadata_stage, deps=("script",)),
+    ]
+
+
+def run_pipeline(
+    topic: str,
+    config: AgentConfig,
+    progress: Optional[ProgressCallback] = None,
+) -> dict[str, Path]:
+    logger.info("Starting pipeline for topic: %s", topic)
+
+    # Retries happen inside the stages (API calls, TTS chunks, encodes); a failed run is not repeated as a whole.
+    # Completed stages are checkpointed instead, so rerunning the workspace resumes at the stage that failed
+    start = time.perf_counter()
+    with lock_workspace(config.workdir):
+        checkpoint = Checkpoint(config.workdir / CHECKPOINT_NAME, _fingerprint(topic, config))
+        result = run_stages(
+            _build_stages(topic, config, progress),
+            max_workers=int(os.getenv("PIPELINE_WORKERS", "4")),
+            checkpoint=checkpoint,
+            progress=progress,
+        )
+    save_json(
+        config.workdir / "timings.json",
+        {
+            "stages": {name: asdict(record) for name, record in result.records.items()},
+            "resumed": result.resumed,
+            "total": round(time.perf_counter() - start, 3),
+        },
+    )
 
     logger.info("Pipeline completed")
-    return {
-        "script": script_path,
-        "audio": audio_path,
-        "thumbnail": thumbnail_path,
-        "video": video_path,
-        "metadata": metadata_path,
+    artifacts = {
+        "script": result.outputs["script"],
+        "audio": result.outputs["audio"],
+        "thumbnail": result.outputs["thumbnail"],
+        "video": result.outputs["video"],
+        "metadata": result.outputs["metadata"],
     }
+    subtitles = config.workdir / "subtitles.srt"
+    if config.render_mode == "scenes" and subtitles.exists():
+        artifacts["subtitles"] = subtitles
+    if config.video_type.lower() == "auto":
+        artifacts["short_video"] = config.workdir / "short.mp4"
+        artifacts["short_metadata"] = config.workdir / "short_metadata.json"
+    return artifacts
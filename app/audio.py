@@ -1,29 +1,145 @@
 from __future__ import annotations
 
 import logging
+import os
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Optional
 
-from moviepy.editor import AudioFileClip, CompositeAudioClip
+from app.cache import get_cache, hash_file, make_key
+from app.scenes import Scene
+from app.utils import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+_AUDIO_SUFFIXES = {".mp3", ".wav", ".ogg", ".m4a", ".aac", ".flac"}
+# Every stem is brought to one layout first; amix and sidechaincompress need matching inputs
+_STEM_FORMAT = "aformat=sample_fmts=fltp:sample_rates=44100:channel_layouts=stereo"
 
-def mix_background(
-    narration_path: Path,
-    bgm_path: Path | None,
-    sfx_paths: list[Path],
-) -> AudioFileClip:
-    narration = AudioFileClip(str(narration_path))
-    clips = [narration]
 
-    if bgm_path and bgm_path.exists():
-        bgm = AudioFileClip(str(bgm_path)).volumex(0.2).set_duration(narration.duration)
-        clips.append(bgm)
+@dataclass(frozen=True)
+class SfxCue:
+    path: Path
+    start_s: float
+
+
+@dataclass(frozen=True)
+class AudioMix:
+    bgm_path: Optional[Path] = None
+    sfx: tuple[SfxCue, ...] = ()
+    # Integrated loudness target in LUFS; None leaves the level as synthesized
+    loudness: Optional[float] = None
+    bgm_volume: float = 0.25
+    sfx_volume: float = 0.6
+
+    @property
+    def active(self) -> bool:
+        return bool(self.bgm_path or self.sfx or self.loudness is not None)
+
+
+def find_sfx(description: str, sfx_dir: Path) -> Optional[Path]:
+    # "SFX: light rain and thunder" picks rain.wav or thunder.mp3 from the library, longest name first
+    text = description.lower()
+    if not text or not sfx_dir.is_dir():
+        return None
+    candidates = [path for path in sfx_dir.iterdir() if path.suffix.lower() in _AUDIO_SUFFIXES]
+    candidates.sort(key=lambda path: len(path.stem), reverse=True)
+    for path in candidates:
+        if path.stem.lower().replace("_", " ").replace("-", " ") in text:
+            return path
+    return None
+
+
+def sfx_cues(timeline: Iterable[tuple[Scene, float, float]], offset: float = 0.0) -> tuple[SfxCue, ...]:
+    sfx_dir = os.getenv("SFX_DIR")
+    if not sfx_dir:
+        return ()
+    cues = []
+    for scene, start, _end in timeline:
+        path = find_sfx(scene.sfx, Path(sfx_dir))
+        if path:
+            cues.append(SfxCue(path, start + offset))
+        elif scene.sfx:
+            logger.info("No sound effect in %s matches %r", sfx_dir, scene.sfx)
+    return tuple(cues)
+
+
+def default_mix(sfx: tuple[SfxCue, ...] = ()) -> AudioMix:
+    bgm = os.getenv("BGM_PATH")
+    bgm_path = Path(bgm) if bgm else None
+    if bgm_path and not bgm_path.exists():
+        logger.warning("Background music %s not found, mixing without it", bgm_path)
+        bgm_path = None
+    loudness = os.getenv("AUDIO_LOUDNESS_LUFS", "").strip().lower()
+    if not loudness:
+        # Normalizing is free when music or effects force a re-encode anyway; a narration-only render keeps
+        # the stream-copied gTTS audio unless a target is set explicitly
+        target = -14.0 if bgm_path or sfx else None
+    else:
+        target = None if loudness in ("off", "none") else float(loudness)
+    return AudioMix(
+        bgm_path=bgm_path,
+        sfx=sfx,
+        loudness=target,
+        bgm_volume=float(os.getenv("BGM_VOLUME", "0.25")),
+        sfx_volume=float(os.getenv("SFX_VOLUME", "0.6")),
+    )
+
+
+def mix_graph(mix: AudioMix, voice: str, first_input: int) -> tuple[list[str], str]:
+    # Returns the extra ffmpeg inputs and a filtergraph that ends in [mixed]; stems stay inside ffmpeg
+    inputs: list[str] = []
+    index = first_input
+    graph = [f"[{voice}]{_STEM_FORMAT}" + (",asplit=2[voice][key]" if mix.bgm_path else "[voice]")]
+    streams = ["[voice]"]
+    if mix.bgm_path:
+        inputs += ["-stream_loop", "-1", "-i", str(mix.bgm_path)]
+        # The narration keys a compressor on the music, so music dips under speech and recovers in pauses
+        graph.append(f"[{index}:a]{_STEM_FORMAT},volume={mix.bgm_volume}[bgm]")
+        graph.append("[bgm][key]sidechaincompress=threshold=0.02:ratio=8:attack=20:release=400[ducked]")
+        streams.append("[ducked]")
+        index += 1
+    for position, cue in enumerate(mix.sfx):
+        inputs += ["-i", str(cue.path)]
+        delay = int(cue.start_s * 1000)
+        graph.append(f"[{index}:a]{_STEM_FORMAT},volume={mix.sfx_volume},adelay={delay}:all=1[sfx{position}]")
+        streams.append(f"[sfx{position}]")
+        index += 1
+
+    if len(streams) > 1:
+        # duration=first keeps the mix exactly as long as the narration; the music input loops forever
+        tail = f"{''.join(streams)}amix=inputs={len(streams)}:duration=first:dropout_transition=0:normalize=0"
     else:
-        logger.info("No background music provided")
+        tail = "[voice]anull"
+    if mix.loudness is not None:
+        # Single-pass EBU R128 normalization; loudnorm resamples internally, so return to 44.1 kHz after it
+        tail += f",loudnorm=I={mix.loudness}:TP=-1.5:LRA=11,aresample=44100"
+    graph.append(f"{tail}[mixed]")
+    return inputs, ";".join(graph)
 
-    for sfx_path in sfx_paths:
-        if sfx_path.exists():
-            clips.append(AudioFileClip(str(sfx_path)).volumex(0.5))
 
-    return CompositeAudioClip(clips)
+def mix_audio(narration_path: Path, output_path: Path, mix: AudioMix) -> Path:
+    cache = get_cache()
+    key = ""
+    if cache:
+        stems = [hash_file(narration_path)]
+        stems += [hash_file(mix.bgm_path)] if mix.bgm_path else []
+        stems += [hash_file(cue.path) for cue in mix.sfx]
+        key = make_key("audio-mix", *stems, repr(mix))
+        if cache.fetch(key, output_path, output_path.suffix):
+            return output_path
+    inputs, graph = mix_graph(mix, "0:a", first_input=1)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    run_ffmpeg(
+        [
+            "-i", str(narration_path),
+            *inputs,
+            "-filter_complex", graph,
+            "-map", "[mixed]",
+            "-c:a", "aac", "-b:a", "192k", "-ar", "44100", "-ac", "2",
+            str(output_path),
+        ]
+    )
+    if cache:
+        cache.put_file(key, output_path, output_path.suffix)
+    return output_path
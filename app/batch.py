@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from app.agent import AgentConfig, run_pipeline
+from app.utils import save_json
+from app.workspace import create_workspace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    topic: str
+    style: str = "Simple Telugu"
+    video_type: str = "Auto"
+    short_duration: int = 3
+    full_duration: int = 15
+    render_mode: str = "still"
+
+
+def _to_item(row: dict[str, Any]) -> BatchItem:
+    known = {item_field.name for item_field in fields(BatchItem)}
+    values = {key: value for key, value in row.items() if key in known and value not in (None, "")}
+    if not values.get("topic"):
+        raise ValueError(f"Batch entry without topic: {row}")
+    for key in ("short_duration", "full_duration"):
+        if key in values:
+            values[key] = int(values[key])
+    return BatchItem(**values)
+
+
+def load_topics(path: Path) -> list[BatchItem]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".jsonl":
+        return [_to_item(json.loads(line)) for line in text.splitlines() if line.strip()]
+    if path.suffix.lower() == ".csv":
+        return [_to_item(row) for row in csv.DictReader(text.splitlines())]
+    return [BatchItem(topic=line.strip()) for line in text.splitlines() if line.strip()]
+
+
+def _run_item(item: BatchItem, output_dir: Path, voice: str, language: str) -> dict[str, Any]:
+    config = AgentConfig(
+        workdir=create_workspace(output_dir, item.topic, asdict(item)),
+        voice=voice,
+        language=language,
+        style=item.style,
+        short_duration=item.short_duration,
+        full_duration=item.full_duration,
+        video_type=item.video_type,
+        render_mode=item.render_mode,
+    )
+    start = time.perf_counter()
+    entry: dict[str, Any] = {**asdict(item), "workdir": str(config.workdir)}
+    try:
+        artifacts = run_pipeline(item.topic, config)
+    except Exception as exc:
+        logger.exception("Batch topic failed: %s", item.topic)
+        entry.update(status="failed", error=str(exc))
+    else:
+        entry.update(status="completed", artifacts={key: str(path) for key, path in artifacts.items()})
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def run_batch(
+    items: list[BatchItem],
+    output_dir: Path,
+    voice: str,
+    language: str,
+    workers: int,
+    manifest_path: Path,
+) -> dict[str, Any]:
+    logger.info("Running batch of %d topics with %d workers", len(items), workers)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as executor:
+        entries = list(executor.map(lambda item: _run_item(item, output_dir, voice, language), items))
+    manifest = {
+        "total": len(entries),
+        "completed": sum(entry["status"] == "completed" for entry in entries),
+        "failed": sum(entry["status"] == "failed" for entry in entries),
+        "seconds": round(time.perf_counter() - start, 3),
+        "items": entries,
+    }
+    save_json(manifest_path, manifest)
+    logger.info("Batch manifest written to %s", manifest_path)
+    return manifest
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_cache: Optional["ArtifactCache"] = None
+_cache_lock = threading.Lock()
+
+
+def make_key(*parts: Union[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _entries(self) -> list[Path]:
+        return [path for path in self.root.glob("*/*") if path.is_file() and not path.name.startswith(".")]
+
+    def get(self, key: str, suffix: str = "") -> Optional[Path]:
+        path = self._path(key, suffix)
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_bytes(self, key: str, suffix: str = "") -> Optional[bytes]:
+        path = self.get(key, suffix)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted by another thread between the lookup and the read
+            return None
+
+    def fetch(self, key: str, output_path: Path, suffix: str = "") -> bool:
+        path = self.get(key, suffix)
+        if path is None:
+            return False
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            shutil.copyfile(path, output_path)
+        except FileNotFoundError:
+            if path.exists():
+                raise
+            # Evicted by another thread between the lookup and the copy
+            return False
+        logger.info("Cache hit for %s", output_path.name)
+        return True
+
+    def put_file(self, key: str, source: Path, suffix: str = "") -> Path:
+        target = self._path(key, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        os.close(fd)
+        shutil.copyfile(source, tmp_name)
+        return self._commit(Path(tmp_name), target)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = "") -> Path:
+        target = self._path(key, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        return self._commit(Path(tmp_name), target)
+
+    def _commit(self, tmp_path: Path, target: Path) -> Path:
+        size = tmp_path.stat().st_size
+        with self._lock:
+            try:
+                # Overwriting a key replaces its bytes, so only the difference counts
+                size -= target.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, target)
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+        return target
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info("Evicted cached artifact %s", path.name)
+        self._size = total
+
+
+def get_cache() -> Optional[ArtifactCache]:
+    global _cache
+    if os.getenv("CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache(
+                Path(os.getenv("CACHE_DIR", ".cache/artifacts")),
+                max_bytes=int(os.getenv("CACHE_MAX_MB", "2048")) * 1024 * 1024,
+            )
+        return _cache
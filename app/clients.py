@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Optional
+
+from app.utils import decrypt_file, encrypt_file
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+
+_lock = threading.Lock()
+_openai_clients: dict[str, Any] = {}
+# Async clients are bound to the event loop that created their connection pool
+_async_clients: "weakref.WeakKeyDictionary[Any, dict[str, Any]]" = weakref.WeakKeyDictionary()
+_youtube_credentials: dict[tuple[str, str], Any] = {}
+# Loading may open a browser consent flow and refreshing hits the network, so YouTube credentials get
+# their own per-token locks instead of blocking the LLM client lookups on _lock
+_youtube_lock = threading.Lock()
+_youtube_locks: dict[tuple[str, str], threading.Lock] = {}
+# googleapiclient services wrap httplib2, which is not thread-safe, so they are cached per thread
+_thread_local = threading.local()
+
+
+def _limits() -> Any:
+    import httpx
+
+    max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60,
+    )
+
+
+def get_openai_client(api_key: Optional[str] = None) -> Any:
+    api_key = api_key or os.getenv("OPENAI_API_KEY", "")
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            from openai import DefaultHttpxClient, OpenAI
+
+            client = OpenAI(api_key=api_key, http_client=DefaultHttpxClient(limits=_limits()))
+            _openai_clients[api_key] = client
+    return client
+
+
+def get_async_openai_client(api_key: Optional[str] = None) -> Any:
+    import asyncio
+
+    api_key = api_key or os.getenv("OPENAI_API_KEY", "")
+    with _lock:
+        clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(api_key)
+        if client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            client = AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=_limits()))
+            clients[api_key] = client
+    return client
+
+
+def get_async_http_client() -> Any:
+    import asyncio
+
+    with _lock:
+        clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get("httpx")
+        if client is None:
+            import httpx
+
+            client = httpx.AsyncClient(limits=_limits(), timeout=30, follow_redirects=True)
+            clients["httpx"] = client
+    return client
+
+
+async def aclose_clients() -> None:
+    import asyncio
+
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        # AsyncOpenAI.close and httpx.AsyncClient.aclose release the loop-bound connection pool
+        await (client.close() if hasattr(client, "close") else client.aclose())
+
+
+def _save_token(creds: Any, token_path: Path) -> None:
+    token_path.write_text(creds.to_json(), encoding="utf-8")
+    encryption_key = os.getenv("YOUTUBE_TOKEN_KEY")
+    if encryption_key:
+        encrypt_file(token_path, encryption_key)
+        logger.info("Encrypted YouTube token file")
+
+
+def load_credentials(client_secret_path: Path, token_path: Path) -> Any:
+    if not client_secret_path.exists():
+        raise FileNotFoundError("client_secret.json not found")
+
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    encryption_key = os.getenv("YOUTUBE_TOKEN_KEY")
+    if token_path.exists() and encryption_key:
+        decrypted = decrypt_file(token_path, encryption_key)
+        token_data = json.loads(decrypted.decode("utf-8"))
+        return Credentials.from_authorized_user_info(token_data, SCOPES)
+
+    if token_path.exists() and not encryption_key:
+        token_data = json.loads(token_path.read_text(encoding="utf-8"))
+        return Credentials.from_authorized_user_info(token_data, SCOPES)
+
+    flow = InstalledAppFlow.from_client_secrets_file(str(client_secret_path), SCOPES)
+    creds = flow.run_local_server(port=0)
+    _save_token(creds, token_path)
+    return creds
+
+
+def get_youtube_credentials(client_secret_path: Path, token_path: Path) -> Any:
+    key = (str(client_secret_path), str(token_path))
+    with _youtube_lock:
+        token_lock = _youtube_locks.setdefault(key, threading.Lock())
+    with token_lock:
+        creds = _youtube_credentials.get(key)
+        if creds is None:
+            creds = load_credentials(client_secret_path, token_path)
+            _youtube_credentials[key] = creds
+        if not creds.valid and creds.expired and creds.refresh_token:
+            from google.auth.transport.requests import Request
+
+            logger.info("Refreshing expired YouTube credentials")
+            creds.refresh(Request())
+            _save_token(creds, token_path)
+    return creds
+
+
+def get_youtube_service(client_secret_path: Path, token_path: Path) -> Any:
+    creds = get_youtube_credentials(client_secret_path, token_path)
+    services = getattr(_thread_local, "youtube", None)
+    if services is None:
+        services = _thread_local.youtube = {}
+    key = (str(client_secret_path), str(token_path))
+    cached = services.get(key)
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+
+    from googleapiclient.discovery import build
+
+    # static_discovery uses the discovery document bundled with the client library
+    service = build("youtube", "v3", credentials=creds, cache_discovery=False, static_discovery=True)
+    services[key] = (creds, service)
+    return service
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    name: str
+    width: int
+    height: int
+    fps: str = "12"
+    preset: str = "veryfast"
+    crf: int = 23
+    threads: int = 0
+    audio_bitrate: str = "160k"
+    # "cover" crops to fill the frame, "blur" fits the image over a blurred fill (landscape art in 9:16)
+    fit: str = "cover"
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def aspect(self) -> str:
+        divisor = math.gcd(self.width, self.height)
+        return f"{self.width // divisor}:{self.height // divisor}"
+
+    @property
+    def thread_count(self) -> int:
+        # 0 lets x264 pick; ENCODE_THREADS caps every profile when several encodes share the host
+        return self.threads or int(os.getenv("ENCODE_THREADS", "0"))
+
+    @property
+    def vertical(self) -> bool:
+        return self.height > self.width
+
+    def frame_filter(self, source: str, output: str) -> str:
+        width, height = self.width, self.height
+        cover = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+        if self.fit == "blur":
+            return (
+                f"[{source}]split[{output}_bg][{output}_fg];"
+                f"[{output}_bg]{cover},boxblur=20:2[{output}_blur];"
+                f"[{output}_fg]scale={width}:{height}:force_original_aspect_ratio=decrease[{output}_fit];"
+                f"[{output}_blur][{output}_fit]overlay=(W-w)/2:(H-h)/2,setsar=1,format=yuv420p[{output}]"
+            )
+        return f"[{source}]{cover},setsar=1,format=yuv420p[{output}]"
+
+    def video_args(self, fps: Optional[str] = None) -> list[str]:
+        args = [
+            "-c:v", "libx264",
+            "-preset", self.preset,
+            "-crf", str(self.crf),
+            "-tune", "stillimage",
+            "-r", fps or self.fps,
+        ]
+        if self.thread_count:
+            args += ["-threads", str(self.thread_count)]
+        return args
+
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-b:a", self.audio_bitrate, "-ar", "44100", "-ac", "2"]
+
+
+PROFILES = {
+    "full_1080p": EncodeProfile("full_1080p", 1920, 1080),
+    "full_720p": EncodeProfile("full_720p", 1280, 720),
+    "short_vertical": EncodeProfile("short_vertical", 1080, 1920, fit="blur"),
+    "draft": EncodeProfile("draft", 854, 480, fps="8", preset="ultrafast", crf=30, audio_bitrate="96k"),
+}
+
+
+def get_profile(name: Optional[str] = None) -> EncodeProfile:
+    name = name or os.getenv("ENCODE_PROFILE", "full_1080p")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encode profile {name!r}, expected one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+@dataclass(frozen=True)
+class Rendition:
+    profile: EncodeProfile
+    output_path: Path
+    max_seconds: Optional[float] = None
+
+
+def prefix_length(durations: list[float], max_seconds: float) -> int:
+    # Leading items that fit the limit; at least one, so an overlong opening is trimmed rather than dropped
+    total = 0.0
+    for count, duration in enumerate(durations):
+        total += duration
+        if total > max_seconds:
+            return max(1, count)
+    return len(durations)
@@ -1,39 +1,140 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import logging
 import os
+import shutil
 from pathlib import Path
+from typing import Any, Optional
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from app.cache import get_cache, make_key
+from app.clients import get_async_http_client, get_async_openai_client, get_openai_client
+from app.rate_limit import athrottle, throttle
+from app.text_render import draw_centered_text
 
 logger = logging.getLogger(__name__)
 
 
-def generate_scene_image(prompt: str, output_path: Path) -> Path:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key)
-        response = client.images.generate(
-            model=os.getenv("OPENAI_IMAGE_MODEL", "gpt-image-1"),
-            prompt=prompt,
-            size="1024x1024",
-        )
-        image_url = response.data[0].url
-        if image_url:
-            import requests
-
-            content = requests.get(image_url, timeout=30).content
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_bytes(content)
-            return output_path
-
-    logger.warning("OPENAI_API_KEY missing or image generation failed, using placeholder")
+def _image_request(prompt: str) -> dict[str, Any]:
+    return {
+        "model": os.getenv("OPENAI_IMAGE_MODEL", "gpt-image-1"),
+        "prompt": prompt,
+        "size": os.getenv("OPENAI_IMAGE_SIZE", "1024x1024"),
+    }
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def image_key(prompt: str) -> str:
+    # Prompts differing only in case or spacing share one generation, across scenes and topics
+    request = _image_request(prompt)
+    return make_key("image", normalize_prompt(prompt), request["model"], request["size"])
+
+
+def _cached_image(prompt: str) -> Optional[bytes]:
+    cache = get_cache()
+    return cache.get_bytes(image_key(prompt), ".png") if cache else None
+
+
+def _store_image(prompt: str, content: Optional[bytes]) -> Optional[bytes]:
+    cache = get_cache()
+    if cache and content:
+        cache.put_bytes(image_key(prompt), content, ".png")
+    return content or None
+
+
+def _inline_image(response: Any) -> tuple[Optional[bytes], Optional[str]]:
+    # gpt-image-1 returns base64 data, DALL-E models a short-lived URL
+    item = response.data[0]
+    if getattr(item, "b64_json", None):
+        return base64.b64decode(item.b64_json), None
+    return None, getattr(item, "url", None)
+
+
+def _placeholder_image(prompt: str, output_path: Path) -> Path:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     image = Image.new("RGB", (1024, 1024), color=(12, 16, 28))
     draw = ImageDraw.Draw(image)
-    font = ImageFont.load_default()
-    draw.text((40, 40), prompt[:120], fill=(255, 215, 0), font=font)
+    draw_centered_text(draw, prompt[:120], 40, image.size, fill=(255, 215, 0), margin=40)
     image.save(output_path)
     return output_path
+
+
+def _save_image(prompt: str, content: Optional[bytes], output_path: Path) -> Path:
+    if content is None:
+        logger.warning("OPENAI_API_KEY missing or image generation failed, using placeholder")
+        return _placeholder_image(prompt, output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(content)
+    return output_path
+
+
+def fetch_image(prompt: str) -> Optional[bytes]:
+    cached = _cached_image(prompt)
+    if cached is not None or not os.getenv("OPENAI_API_KEY"):
+        return cached
+    throttle("openai_images")
+    response = get_openai_client(os.environ["OPENAI_API_KEY"]).images.generate(**_image_request(prompt))
+    content, image_url = _inline_image(response)
+    if content is None and image_url:
+        import requests
+
+        download = requests.get(image_url, timeout=30)
+        download.raise_for_status()
+        content = download.content
+    return _store_image(prompt, content)
+
+
+async def afetch_image(prompt: str) -> Optional[bytes]:
+    cached = await asyncio.to_thread(_cached_image, prompt)
+    if cached is not None or not os.getenv("OPENAI_API_KEY"):
+        return cached
+    await athrottle("openai_images")
+    response = await get_async_openai_client(os.environ["OPENAI_API_KEY"]).images.generate(**_image_request(prompt))
+    content, image_url = _inline_image(response)
+    if content is None and image_url:
+        download = await get_async_http_client().get(image_url)
+        download.raise_for_status()
+        content = download.content
+    return await asyncio.to_thread(_store_image, prompt, content)
+
+
+def generate_scene_image(prompt: str, output_path: Path) -> Path:
+    return _save_image(prompt, fetch_image(prompt), output_path)
+
+
+async def agenerate_scene_image(prompt: str, output_path: Path) -> Path:
+    return await asyncio.to_thread(_save_image, prompt, await afetch_image(prompt), output_path)
+
+
+async def agenerate_images(prompts: dict[Path, str]) -> set[Path]:
+    # Returns the paths that fell back to a placeholder, so callers can avoid keeping them as finished art
+    limit = asyncio.Semaphore(max(1, int(os.getenv("IMAGE_WORKERS", "4"))))
+    groups: dict[str, list[Path]] = {}
+    for path, prompt in prompts.items():
+        groups.setdefault(image_key(prompt), []).append(path)
+    placeholders: set[Path] = set()
+
+    async def generate(paths: list[Path]) -> None:
+        prompt = prompts[paths[0]]
+        async with limit:
+            try:
+                content = await afetch_image(prompt)
+            except Exception as exc:
+                logger.warning("Image generation failed for %r: %s", prompt[:60], exc)
+                content = None
+        if content is None:
+            placeholders.update(paths)
+        await asyncio.to_thread(_save_image, prompt, content, paths[0])
+        for path in paths[1:]:
+            await asyncio.to_thread(shutil.copyfile, paths[0], path)
+
+    if len(groups) < len(prompts):
+        logger.info("Generating %d images for %d prompts", len(groups), len(prompts))
+    await asyncio.gather(*(generate(paths) for paths in groups.values()))
+    return placeholders
@@ -2,19 +2,20 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
+from app.text_render import draw_centered_text
 
-def build_intro_outro(title: str, size: tuple[int, int]) -> tuple[Path, Path]:
-    intro_path = Path("assets") / "intro.png"
-    outro_path = Path("assets") / "outro.png"
-    intro_path.parent.mkdir(parents=True, exist_ok=True)
+
+def build_intro_outro(title: str, size: tuple[int, int], output_dir: Path) -> tuple[Path, Path]:
+    intro_path = output_dir / "intro.png"
+    outro_path = output_dir / "outro.png"
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     for path, text in [(intro_path, f"{title}\nTelugu AI Studio"), (outro_path, "ధన్యవాదాలు")]:
         image = Image.new("RGB", size, color=(5, 8, 20))
         draw = ImageDraw.Draw(image)
-        font = ImageFont.load_default()
-        draw.text((60, size[1] // 2), text, fill=(255, 215, 0), font=font)
+        draw_centered_text(draw, text, max(24, size[1] // 12), size, fill=(255, 215, 0), bold=True)
         image.save(path)
 
     return intro_path, outro_path
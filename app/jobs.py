@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.metrics import record_child, worker_usage
+
+logger = logging.getLogger(__name__)
+
+_encode_pool: Optional[ProcessPoolExecutor] = None
+_encode_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    id: str
+    topic: str
+    status: str = "queued"
+    artifacts: dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class JobQueue:
+    def __init__(
+        self,
+        max_workers: int,
+        retention_seconds: Optional[float] = None,
+        max_finished: Optional[int] = None,
+    ) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._events: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if retention_seconds is None:
+            retention_seconds = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+        if max_finished is None:
+            max_finished = int(os.getenv("MAX_FINISHED_JOBS", "1000"))
+        self._retention_seconds = retention_seconds
+        self._max_finished = max_finished
+
+    def submit(self, topic: str, func: Callable[..., dict[str, Path]], *args: Any, **kwargs: Any) -> Job:
+        job = Job(id=uuid.uuid4().hex, topic=topic)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._events[job.id] = []
+            self._append_event(job.id, {"type": "job_queued"})
+        self._executor.submit(self._run, job, func, args, kwargs)
+        logger.info("Queued job %s for topic: %s", job.id, topic)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return asdict(job) if job else None
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        with self._lock:
+            self._append_event(job_id, event)
+
+    def _append_event(self, job_id: str, event: dict[str, Any]) -> None:
+        events = self._events.get(job_id)
+        if events is not None:
+            events.append({**event, "job_id": job_id, "seq": len(events), "time": time.time()})
+
+    def _prune(self) -> None:
+        # Finished jobs and their event logs are kept for a while so clients can collect results, then dropped
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        finished.sort(key=lambda job: job.finished_at)
+        cutoff = time.time() - self._retention_seconds
+        excess = len(finished) - self._max_finished
+        for position, job in enumerate(finished):
+            if position >= excess and job.finished_at >= cutoff:
+                break
+            del self._jobs[job.id]
+            del self._events[job.id]
+
+    def events(self, job_id: str, start: int = 0) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._events.get(job_id, [])[start:])
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable[..., dict[str, Path]], args: tuple, kwargs: dict) -> None:
+        with self._lock:
+            job.status = "running"
+            job.started_at = time.time()
+            self._append_event(job.id, {"type": "job_started"})
+        try:
+            artifacts = func(*args, progress=lambda event: self.publish(job.id, event), **kwargs)
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            with self._lock:
+                job.status = "failed"
+                job.error = str(exc)
+                job.finished_at = time.time()
+                self._append_event(job.id, {"type": "job_failed", "error": str(exc)})
+                self._prune()
+            return
+        with self._lock:
+            job.status = "completed"
+            job.artifacts = {key: str(path) for key, path in artifacts.items()}
+            job.finished_at = time.time()
+            self._append_event(job.id, {"type": "job_completed", "artifacts": job.artifacts})
+            self._prune()
+        logger.info("Job %s completed", job.id)
+
+
+def encode_pool() -> Optional[ProcessPoolExecutor]:
+    global _encode_pool
+    workers = int(os.getenv("ENCODE_WORKERS", "2"))
+    if workers <= 0:
+        return None
+    with _encode_lock:
+        if _encode_pool is None:
+            # spawn avoids forking a process that already runs job/stage threads
+            _encode_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _encode_pool
+
+
+def _measured(func: Callable[..., Any], args: tuple, kwargs: dict[str, Any]) -> tuple[Any, float, float]:
+    with worker_usage() as usage:
+        result = func(*args, **kwargs)
+    return result, usage.cpu_seconds, usage.peak_child_rss_mb
+
+
+def _collect(future: Future) -> Any:
+    # Worker CPU is charged to the stage that submitted the encode, which the worker process cannot see
+    result, cpu_seconds, rss_mb = future.result()
+    record_child(cpu_seconds, rss_mb)
+    return result
+
+
+def run_encode(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    pool = encode_pool()
+    if pool is None:
+        return func(*args, **kwargs)
+    return _collect(pool.submit(_measured, func, args, kwargs))
+
+
+def map_encode(
+    func: Callable[..., Any],
+    calls: list[tuple],
+    progress: Optional[Callable[[float], None]] = None,
+    weights: Optional[list[float]] = None,
+) -> list[Any]:
+    # Progress is the weighted share of finished calls; workers cannot report from inside an encode
+    weights = weights or [1.0] * len(calls)
+    total = sum(weights) or 1.0
+    done = 0.0
+
+    def advance(index: int) -> None:
+        nonlocal done
+        done += weights[index]
+        if progress:
+            progress(min(1.0, done / total))
+
+    results: list[Any] = [None] * len(calls)
+    pool = encode_pool()
+    if pool is None:
+        for index, args in enumerate(calls):
+            results[index] = func(*args)
+            advance(index)
+        return results
+    futures = {pool.submit(_measured, func, args, {}): index for index, args in enumerate(calls)}
+    for future in as_completed(futures):
+        results[futures[future]] = _collect(future)
+        advance(futures[future])
+    return results
@@ -1,25 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, Optional
 
 import typer
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 from app.agent import AgentConfig, run_pipeline
+from app.batch import load_topics, run_batch
+from app.jobs import JobQueue
 from app.logging_config import configure_logging
-from app.upload import upload_video
+from app.metrics import registry
+from app.scene_render import rerender_scene_video
+from app.upload import UploadJob, upload_many, upload_video
 from app.validation import validate_tts, validate_upload_requirements, validate_video
+from app.workspace import collect_workspaces, create_workspace, lock_workspace
 
 load_dotenv()
 configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Telugu YouTube AI Agent")
+job_queue = JobQueue(max_workers=int(os.getenv("MAX_CONCURRENT_JOBS", "2")))
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Collection deletes CLI run outputs too, so the API only does it at startup when asked to
+    if os.getenv("WORKSPACE_GC_ON_STARTUP", "0") == "1":
+        await asyncio.to_thread(collect_workspaces, Path(os.getenv("OUTPUT_DIR", "outputs")))
+    yield
+    job_queue.shutdown(wait=False)
+
+
+app = FastAPI(title="Telugu YouTube AI Agent", lifespan=lifespan)
 cli = typer.Typer(add_completion=False)
 
 
@@ -30,21 +51,66 @@ class TopicRequest(BaseModel):
     full_duration: int = 15
     category: str = "General"
     style: str = "Simple Telugu"
+    render_mode: str = "still"
 
 
-@app.post("/generate")
+@app.post("/generate", status_code=202)
 async def generate(req: TopicRequest) -> dict[str, str]:
     config = AgentConfig(
-        workdir=Path(os.getenv("OUTPUT_DIR", "outputs")) / req.topic.replace(" ", "_"),
+        workdir=create_workspace(Path(os.getenv("OUTPUT_DIR", "outputs")), req.topic, req.model_dump()),
         voice=os.getenv("TTS_VOICE", "co.in"),
         language=os.getenv("TTS_LANGUAGE", "te"),
         style=req.style,
         short_duration=req.short_duration,
         full_duration=req.full_duration,
         video_type=req.video_type,
+        render_mode=req.render_mode,
     )
-    artifacts = run_pipeline(req.topic, config)
-    return {key: str(path) for key, path in artifacts.items()}
+    job = job_queue.submit(req.topic, run_pipeline, req.topic, config)
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict[str, Any]:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(None)) -> StreamingResponse:
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def stream() -> AsyncIterator[str]:
+        index = start
+        idle = 0.0
+        while True:
+            events = job_queue.events(job_id, index)
+            for event in events:
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n"
+            index += len(events)
+            if events and events[-1]["type"] in ("job_completed", "job_failed"):
+                return
+            if not events:
+                job = job_queue.get(job_id)
+                if job is None or job["status"] in ("completed", "failed"):
+                    return
+            idle = 0.0 if events else idle + 0.5
+            if idle >= 15:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @cli.command()
@@ -54,20 +120,30 @@ def run(
     short_duration: int = typer.Option(3, help="Short duration in minutes"),
     full_duration: int = typer.Option(15, help="Full duration in minutes"),
     style: str = typer.Option("Simple Telugu", help="Content style"),
+    render_mode: str = typer.Option("still", help="still (thumbnail over audio) or scenes"),
     upload: bool = typer.Option(False, help="Upload to YouTube"),
     client_secret: Optional[Path] = typer.Option(
         None, help="Path to client_secret.json"
     ),
     token_path: Optional[Path] = typer.Option(None, help="Path to token.json"),
+    workdir: Optional[Path] = typer.Option(None, help="Existing workspace to resume instead of a new one"),
 ) -> None:
+    settings = {
+        "video_type": video_type,
+        "short_duration": short_duration,
+        "full_duration": full_duration,
+        "style": style,
+        "render_mode": render_mode,
+    }
     config = AgentConfig(
-        workdir=Path(os.getenv("OUTPUT_DIR", "outputs")) / topic.replace(" ", "_"),
+        workdir=workdir or create_workspace(Path(os.getenv("OUTPUT_DIR", "outputs")), topic, settings),
         voice=os.getenv("TTS_VOICE", "co.in"),
         language=os.getenv("TTS_LANGUAGE", "te"),
         style=style,
         short_duration=short_duration,
         full_duration=full_duration,
         video_type=video_type,
+        render_mode=render_mode,
     )
     artifacts = run_pipeline(topic, config)
     logger.info("Artifacts: %s", artifacts)
@@ -84,6 +160,69 @@ def run(
         )
 
 
+@cli.command()
+def rerender(
+    workdir: Path = typer.Argument(..., help="Scenes-mode workspace whose script.txt was edited"),
+) -> None:
+    with lock_workspace(workdir):
+        video = rerender_scene_video(workdir)
+    logger.info("Re-rendered %s", video)
+
+
+@cli.command()
+def batch(
+    topics_file: Path = typer.Argument(..., help="CSV, JSONL or plain text file with one topic per line"),
+    workers: int = typer.Option(2, help="Topics processed concurrently"),
+    manifest: Optional[Path] = typer.Option(None, help="Summary manifest path"),
+) -> None:
+    output_dir = Path(os.getenv("OUTPUT_DIR", "outputs"))
+    summary = run_batch(
+        load_topics(topics_file),
+        output_dir=output_dir,
+        voice=os.getenv("TTS_VOICE", "co.in"),
+        language=os.getenv("TTS_LANGUAGE", "te"),
+        workers=workers,
+        manifest_path=manifest or output_dir / "batch_manifest.json",
+    )
+    logger.info("Batch finished: %d completed, %d failed", summary["completed"], summary["failed"])
+    if summary["failed"]:
+        raise typer.Exit(code=1)
+
+
+@cli.command()
+def upload(
+    workdirs: list[Path] = typer.Argument(..., help="Run directories containing video.mp4 and metadata.json"),
+    client_secret: Path = typer.Option(..., help="Path to client_secret.json"),
+    token_path: Path = typer.Option(..., help="Path to token.json"),
+    concurrency: int = typer.Option(2, help="Videos uploaded at the same time"),
+) -> None:
+    jobs = [
+        UploadJob(
+            video_path=workdir / "video.mp4",
+            metadata_path=workdir / "metadata.json",
+            thumbnail_path=workdir / "thumbnail.png",
+        )
+        for workdir in workdirs
+    ]
+    results = upload_many(jobs, client_secret, token_path, max_concurrent=concurrency)
+    for result in results:
+        logger.info("Upload result: %s", result)
+    if any(result["status"] != "uploaded" for result in results):
+        raise typer.Exit(code=1)
+
+
+@cli.command()
+def gc(
+    max_age_hours: Optional[float] = typer.Option(None, help="Remove workspaces idle for longer than this"),
+    max_mb: Optional[float] = typer.Option(None, help="Remove oldest workspaces until the total fits"),
+    dry_run: bool = typer.Option(False, help="Only list what would be removed"),
+) -> None:
+    removed = collect_workspaces(
+        Path(os.getenv("OUTPUT_DIR", "outputs")), max_age_hours=max_age_hours, max_mb=max_mb, dry_run=dry_run
+    )
+    logger.info("%s %d workspaces", "Would remove" if dry_run else "Removed", len(removed))
+
+
 @cli.command()
 def validate(
     output_dir: Path = typer.Option(
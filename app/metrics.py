@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import contextvars
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current_record: contextvars.ContextVar[Optional["StageRecord"]] = contextvars.ContextVar(
+    "current_stage_record", default=None
+)
+# Pool threads working for one stage update its record concurrently
+_record_lock = threading.Lock()
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    # Largest ffmpeg child the stage started; the server's own peak is the process-level RSS gauge
+    peak_child_rss_mb: float = 0.0
+    bytes_written: int = 0
+    retries: int = 0
+    error: Optional[str] = None
+
+    def add_output(self, output: Any) -> None:
+        if isinstance(output, Path) and output.is_file():
+            self.bytes_written += output.stat().st_size
+
+
+def _process_cpu() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, dict[str, float]] = {}
+        self._retries: dict[str, int] = {}
+
+    def observe(self, record: StageRecord) -> None:
+        with self._lock:
+            totals = self._stages.setdefault(
+                record.stage,
+                {"count": 0, "errors": 0, "wall": 0.0, "cpu": 0.0, "bytes": 0, "retries": 0},
+            )
+            totals["count"] += 1
+            totals["errors"] += 1 if record.error else 0
+            totals["wall"] += record.wall_seconds
+            totals["cpu"] += record.cpu_seconds
+            totals["bytes"] += record.bytes_written
+            totals["retries"] += record.retries
+
+    def record_retry(self, name: str) -> None:
+        with self._lock:
+            self._retries[name] = self._retries.get(name, 0) + 1
+        record = _current_record.get()
+        if record is not None:
+            with _record_lock:
+                record.retries += 1
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            stages = {name: dict(values) for name, values in self._stages.items()}
+            retries = dict(self._retries)
+        lines = [
+            "# HELP pipeline_stage_duration_seconds Wall time spent in pipeline stages.",
+            "# TYPE pipeline_stage_duration_seconds summary",
+        ]
+        for name, values in sorted(stages.items()):
+            lines.append(f'pipeline_stage_duration_seconds_sum{{stage="{name}"}} {values["wall"]:.6f}')
+            lines.append(f'pipeline_stage_duration_seconds_count{{stage="{name}"}} {int(values["count"])}')
+        series = [
+            ("pipeline_stage_cpu_seconds_total", "CPU time spent in pipeline stages.", "cpu"),
+            ("pipeline_stage_errors_total", "Pipeline stage failures.", "errors"),
+            ("pipeline_stage_bytes_written_total", "Bytes written by pipeline stage outputs.", "bytes"),
+            ("pipeline_stage_retries_total", "Retries performed inside pipeline stages.", "retries"),
+        ]
+        for metric, help_text, key in series:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, values in sorted(stages.items()):
+                lines.append(f'{metric}{{stage="{name}"}} {values[key]:g}')
+        lines.append("# HELP retry_attempts_total Retries performed by with_retry, per function.")
+        lines.append("# TYPE retry_attempts_total counter")
+        for name, count in sorted(retries.items()):
+            lines.append(f'retry_attempts_total{{function="{name}"}} {count}')
+        lines.append("# HELP process_peak_rss_bytes Peak resident set size of the process.")
+        lines.append("# TYPE process_peak_rss_bytes gauge")
+        lines.append(f"process_peak_rss_bytes {int(_peak_rss_mb() * 1024 * 1024)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_child(cpu_seconds: float, rss_mb: float) -> None:
+    record = _current_record.get()
+    if record is not None:
+        with _record_lock:
+            record.cpu_seconds += cpu_seconds
+            record.peak_child_rss_mb = max(record.peak_child_rss_mb, rss_mb)
+
+
+def bind_stage(func: Callable[..., T]) -> Callable[..., T]:
+    # Thread pools do not inherit context variables; the wrapper runs func against the caller's stage record,
+    # so its retries, ffmpeg children and own thread CPU are charged to that stage
+    record = _current_record.get()
+    if record is None:
+        return func
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        token = _current_record.set(record)
+        cpu_start = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_record.reset(token)
+            with _record_lock:
+                record.cpu_seconds += time.thread_time() - cpu_start
+
+    return run
+
+
+@contextmanager
+def worker_usage() -> Iterator[StageRecord]:
+    # Encode workers run one task at a time, so process-wide deltas there belong to that task alone,
+    # including ffmpeg processes started by MoviePy
+    record = StageRecord(stage="encode")
+    token = _current_record.set(record)
+    cpu_start = _process_cpu()
+    try:
+        yield record
+    finally:
+        _current_record.reset(token)
+        record.cpu_seconds = _process_cpu() - cpu_start
+
+
+@contextmanager
+def instrument(stage: str) -> Iterator[StageRecord]:
+    record = StageRecord(stage=stage)
+    token = _current_record.set(record)
+    wall_start = time.perf_counter()
+    # Thread CPU covers in-process work; ffmpeg children and encode workers report theirs via record_child
+    cpu_start = time.thread_time()
+    try:
+        yield record
+    except Exception as exc:
+        record.error = type(exc).__name__
+        raise
+    finally:
+        _current_record.reset(token)
+        record.wall_seconds = round(time.perf_counter() - wall_start, 3)
+        record.cpu_seconds = round(record.cpu_seconds + time.thread_time() - cpu_start, 3)
+        record.peak_child_rss_mb = round(record.peak_child_rss_mb, 1)
+        registry.observe(record)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.cache import hash_file
+from app.metrics import StageRecord, instrument
+from app.utils import load_json
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[dict[str, Any]], Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineResult:
+    outputs: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+    records: dict[str, StageRecord] = field(default_factory=dict)
+    resumed: list[str] = field(default_factory=list)
+
+
+class Checkpoint:
+    def __init__(self, path: Path, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        data = load_json(path) if path.exists() else {}
+        if data.get("fingerprint") == fingerprint:
+            self._stages: dict[str, dict[str, str]] = {
+                name: entry for name, entry in data.get("stages", {}).items() if isinstance(entry, dict)
+            }
+        else:
+            self._stages = {}
+
+    def restore(self, name: str) -> Optional[Path]:
+        # An output edited or replaced since it was recorded no longer counts as this stage's result
+        entry = self._stages.get(name)
+        if not entry:
+            return None
+        path = Path(entry["path"])
+        try:
+            if hash_file(path) == entry["sha256"]:
+                return path
+        except OSError:
+            pass
+        logger.info("Checkpointed output of stage %s is missing or changed, running it again", name)
+        return None
+
+    def record(self, name: str, output: Any) -> None:
+        if not isinstance(output, Path):
+            return
+        entry = {"path": str(output), "sha256": hash_file(output)}
+        with self._lock:
+            self._stages[name] = entry
+            payload = {"fingerprint": self.fingerprint, "stages": self._stages}
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp_path.replace(self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stages = {}
+            self.path.unlink(missing_ok=True)
+
+
+def _check_graph(stages: list[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError("Duplicate stage names in pipeline")
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in names]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+
+def _emit(progress: Optional[ProgressCallback], event: dict[str, Any]) -> None:
+    if progress:
+        progress(event)
+
+
+def _run_timed(
+    stage: Stage, inputs: dict[str, Any], progress: Optional[ProgressCallback]
+) -> tuple[Any, StageRecord]:
+    logger.info("Stage %s started", stage.name)
+    _emit(progress, {"type": "stage_started", "stage": stage.name})
+    with instrument(stage.name) as record:
+        value = stage.func(inputs)
+        record.add_output(value)
+    logger.info("Stage %s finished in %.2fs", stage.name, record.wall_seconds)
+    _emit(progress, {"type": "stage_finished", "stage": stage.name, "seconds": record.wall_seconds})
+    return value, record
+
+
+def run_stages(
+    stages: list[Stage],
+    max_workers: int = 4,
+    checkpoint: Optional[Checkpoint] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> PipelineResult:
+    _check_graph(stages)
+    result = PipelineResult()
+    pending = {stage.name: stage for stage in stages}
+    running: dict[Future, Stage] = {}
+    error: Optional[BaseException] = None
+
+    if checkpoint:
+        # A stage resumes only when all of its inputs resumed too; anything downstream of a rerun is rerun
+        restorable = True
+        while restorable:
+            restorable = False
+            for name, stage in list(pending.items()):
+                if not all(dep in result.resumed for dep in stage.deps):
+                    continue
+                restored = checkpoint.restore(name)
+                if restored is not None:
+                    del pending[name]
+                    result.outputs[name] = restored
+                    result.resumed.append(name)
+                    restorable = True
+                    _emit(progress, {"type": "stage_resumed", "stage": name})
+        if result.resumed:
+            logger.info("Resuming pipeline, skipping completed stages: %s", ", ".join(result.resumed))
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+        while (pending and error is None) or running:
+            if error is None:
+                for name, stage in list(pending.items()):
+                    if all(dep in result.outputs for dep in stage.deps):
+                        del pending[name]
+                        inputs = {dep: result.outputs[dep] for dep in stage.deps}
+                        running[executor.submit(_run_timed, stage, inputs, progress)] = stage
+            if not running:
+                raise ValueError(f"Pipeline has a dependency cycle: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    value, record = future.result()
+                except Exception as exc:
+                    logger.error("Stage %s failed: %s", stage.name, exc)
+                    _emit(progress, {"type": "stage_failed", "stage": stage.name, "error": str(exc)})
+                    error = error or exc
+                    continue
+                result.outputs[stage.name] = value
+                result.timings[stage.name] = record.wall_seconds
+                result.records[stage.name] = record
+                if checkpoint:
+                    checkpoint.record(stage.name, value)
+
+    if error is not None:
+        raise error
+    if checkpoint:
+        # A finished run is not resumed; the next run with this workspace starts over
+        checkpoint.clear()
+    return result
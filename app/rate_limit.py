@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# (requests per minute env, default, tokens per minute env, default)
+_UPSTREAMS: dict[str, tuple[str, float, Optional[str], float]] = {
+    "openai": ("OPENAI_RPM", 500, "OPENAI_TPM", 200_000),
+    "openai_images": ("OPENAI_IMAGES_PM", 50, None, 0),
+    # gTTS splits text into ~100 character requests to translate.google
+    "gtts": ("GTTS_RPM", 120, None, 0),
+}
+
+_limiters: dict[str, "UpstreamLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._clock = clock
+        self._updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Oversized requests still pass once the bucket is full instead of waiting forever
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class UpstreamLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+    def reserve(self, requests: int = 1, tokens: int = 0) -> float:
+        with self._lock:
+            wait = self.requests.reserve(requests)
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens))
+            return max(wait, self._blocked_until - self._clock())
+
+    def acquire(self, requests: int = 1, tokens: int = 0) -> None:
+        wait = self.reserve(requests, tokens)
+        if wait > 0:
+            logger.debug("Rate limited, waiting %.2fs", wait)
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+
+def get_limiter(upstream: str) -> UpstreamLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None:
+            rpm_env, rpm_default, tpm_env, tpm_default = _UPSTREAMS[upstream]
+            limiter = UpstreamLimiter(
+                float(os.getenv(rpm_env, str(rpm_default))),
+                float(os.getenv(tpm_env, str(tpm_default))) if tpm_env else None,
+            )
+            _limiters[upstream] = limiter
+        return limiter
+
+
+def estimate_tokens(prompt: str, completion_tokens: int = 1500) -> int:
+    # Telugu script tokenizes at roughly two characters per token
+    return math.ceil(len(prompt) / 2) + completion_tokens
+
+
+def throttle(upstream: str, requests: int = 1, tokens: int = 0) -> None:
+    get_limiter(upstream).acquire(requests, tokens)
+
+
+async def athrottle(upstream: str, requests: int = 1, tokens: int = 0) -> None:
+    wait = get_limiter(upstream).reserve(requests, tokens)
+    if wait > 0:
+        await asyncio.sleep(wait)
@@ -1,24 +1,120 @@
 from __future__ import annotations
 
+import asyncio
 import functools
+import inspect
+import logging
+import random
 import time
-from typing import Callable, TypeVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TypeVar
+
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
 
 F = TypeVar("F", bound=Callable[..., object])
 
+_RETRYABLE_STATUS = {408, 409, 425, 429}
+_PERMANENT_ERRORS = (
+    FileNotFoundError,
+    PermissionError,
+    ValueError,
+    TypeError,
+    KeyError,
+    NotImplementedError,
+)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # openai/httpx expose status_code, googleapiclient exposes resp.status and gTTS keeps the response in rsp
+    while exc is not None:
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            resp = getattr(exc, "resp", None) or getattr(exc, "rsp", None) or getattr(exc, "response", None)
+            status = getattr(resp, "status", None) or getattr(resp, "status_code", None)
+        if isinstance(status, int) or (isinstance(status, str) and status.isdigit()):
+            return int(status)
+        exc = exc.__cause__
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    while exc is not None:
+        for attr in ("response", "resp", "rsp"):
+            headers = getattr(getattr(exc, attr, None), "headers", None)
+            if headers is None and isinstance(getattr(exc, attr, None), dict):
+                headers = getattr(exc, attr)
+            value = headers.get("retry-after") or headers.get("Retry-After") if headers else None
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    try:
+                        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        return None
+        exc = exc.__cause__
+    return None
+
 
-def with_retry(attempts: int = 3, wait_seconds: float = 1.0, backoff: float = 2.0) -> Callable[[F], F]:
+def is_retryable(exc: BaseException) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    return not isinstance(exc, _PERMANENT_ERRORS)
+
+
+def _next_delay(name: str, exc: BaseException, delay: float, attempt: int, attempts: int, upstream: Optional[str]) -> float:
+    registry.record_retry(name)
+    # Equal jitter keeps concurrent callers from retrying in lockstep
+    sleep_for = delay / 2 + random.uniform(0, delay / 2)
+    retry_after = retry_after_seconds(exc)
+    if retry_after is not None:
+        sleep_for = max(sleep_for, retry_after)
+    if upstream and _status_code(exc) == 429:
+        from app.rate_limit import get_limiter
+
+        get_limiter(upstream).pause(sleep_for)
+    logger.warning("%s failed (%s), retry %d/%d in %.1fs", name, exc, attempt, attempts - 1, sleep_for)
+    return sleep_for
+
+
+def with_retry(
+    attempts: int = 3,
+    wait_seconds: float = 1.0,
+    backoff: float = 2.0,
+    retry_if: Callable[[BaseException], bool] = is_retryable,
+    upstream: Optional[str] = None,
+) -> Callable[[F], F]:
     def decorator(func: F) -> F:
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                delay = wait_seconds
+                for attempt in range(1, attempts + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as exc:
+                        if attempt >= attempts or not retry_if(exc):
+                            raise
+                        await asyncio.sleep(_next_delay(name, exc, delay, attempt, attempts, upstream))
+                        delay *= backoff
+
+            return async_wrapper  # type: ignore[return-value]
+
         @functools.wraps(func)
-        def wrapper(*args, **kwargs):
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
             delay = wait_seconds
             for attempt in range(1, attempts + 1):
                 try:
                     return func(*args, **kwargs)
-                except Exception:
-                    if attempt >= attempts:
+                except Exception as exc:
+                    if attempt >= attempts or not retry_if(exc):
                         raise
-                    time.sleep(delay)
+                    time.sleep(_next_delay(name, exc, delay, attempt, attempts, upstream))
                     delay *= backoff
             return func(*args, **kwargs)
 
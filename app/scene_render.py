@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.audio import AudioMix, default_mix, mix_graph, sfx_cues
+from app.cache import hash_file, make_key
+from app.clients import aclose_clients
+from app.encoding import EncodeProfile, Rendition, get_profile, prefix_length
+from app.image_gen import agenerate_images, image_key
+from app.intro_outro import build_intro_outro
+from app.jobs import map_encode
+from app.pipeline import CHECKPOINT_NAME
+from app.scenes import Scene, build_timestamps, parse_scenes
+from app.subtitles import build_cues, burn_filter, write_subtitles
+from app.tts import synthesize_voice, write_mp3
+from app.utils import load_json, mp3_duration, run_ffmpeg, save_json
+from app.video import prepare_frame
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def load_scenes(script: str, title: str) -> list[Scene]:
+    default_duration = float(os.getenv("SCENE_DEFAULT_SECONDS", "8"))
+    scenes = parse_scenes(script, default_duration_s=default_duration)
+    if scenes:
+        return scenes
+    # Scripts without "Scene" headings become one scene per paragraph
+    paragraphs = [" ".join(block.split()) for block in script.split("\n\n") if block.strip()]
+    return [
+        Scene(
+            index=position,
+            title=f"Scene {position}",
+            narration=paragraph,
+            dialogue="",
+            duration_s=default_duration,
+            visual_prompt=f"{title}, cinematic illustration",
+            sfx="",
+        )
+        for position, paragraph in enumerate(paragraphs, start=1)
+    ]
+
+
+def narration_text(scenes: list[Scene]) -> str:
+    return "\n\n".join(scene.narration for scene in scenes if scene.narration)
+
+
+@dataclass(frozen=True)
+class SegmentOutput:
+    profile: EncodeProfile
+    output_path: Path
+    # Already at the profile's frame size (see video.prepare_frame)
+    frame_path: Path
+    subtitle_path: Optional[Path] = None
+
+
+def encode_segment(audio_path: Optional[Path], duration_s: float, outputs: list[SegmentOutput]) -> list[Path]:
+    duration = f"{duration_s:.3f}"
+    args: list[str] = []
+    graph = []
+    for index, output in enumerate(outputs):
+        args += ["-i", str(output.frame_path)]
+        # The frame is decoded once and repeated by the loop filter; "-loop 1" would decode it for every frame
+        chain = f"[{index}:v]loop=loop=-1:size=1,setpts=N/({output.profile.fps})/TB,setsar=1,format=yuv420p"
+        if output.subtitle_path:
+            # Burnt in during the segment encode itself, so no extra pass over the video
+            chain += f",{burn_filter(output.subtitle_path)}"
+        graph.append(f"{chain}[v{index}]")
+    if audio_path:
+        args += ["-i", str(audio_path)]
+    else:
+        args += ["-f", "lavfi", "-t", duration, "-i", "anullsrc=r=44100:cl=stereo"]
+    args += ["-filter_complex", ";".join(graph)]
+    for index, output in enumerate(outputs):
+        args += [
+            "-map", f"[v{index}]",
+            "-map", f"{len(outputs)}:a",
+            "-af", "apad",
+            "-t", duration,
+            *output.profile.video_args(),
+            # Every segment shares the profile's audio parameters so the concat demuxer can stream-copy them
+            *output.profile.audio_args(),
+            str(output.output_path),
+        ]
+    run_ffmpeg(args)
+    return [output.output_path for output in outputs]
+
+
+def concat_segments(
+    segments: list[Path],
+    output_path: Path,
+    subtitle_path: Optional[Path] = None,
+    mix: Optional[AudioMix] = None,
+    max_seconds: Optional[float] = None,
+    duration_s: Optional[float] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Path:
+    # The list sits next to the segments and goes away with the concat, leaving only the video in the workspace
+    handle, name = tempfile.mkstemp(prefix=f"{output_path.stem}-", suffix=".txt", dir=segments[0].parent)
+    list_path = Path(name)
+    with os.fdopen(handle, "w", encoding="utf-8") as listing:
+        listing.write("".join(f"file '{segment.resolve()}'\n" for segment in segments))
+    args = ["-f", "concat", "-safe", "0", "-i", str(list_path)]
+    outputs = ["-map", "0:v", "-c:v", "copy"]
+    if mix and mix.active:
+        # Video is still stream-copied; only the joined narration goes through music, effects and loudness
+        inputs, graph = mix_graph(mix, "0:a", first_input=1)
+        args += inputs
+        outputs += ["-filter_complex", graph, "-map", "[mixed]", "-c:a", "aac", "-b:a", "192k"]
+    else:
+        outputs += ["-map", "0:a", "-c:a", "copy"]
+    if subtitle_path:
+        outputs += ["-map", str(args.count("-i")), "-c:s", "mov_text", "-metadata:s:s:0", "language=tel"]
+        args += ["-i", str(subtitle_path)]
+    if max_seconds:
+        outputs += ["-t", f"{max_seconds:.3f}"]
+    try:
+        run_ffmpeg(
+            [*args, *outputs, "-movflags", "+faststart", str(output_path)],
+            duration_s=min(duration_s, max_seconds) if duration_s and max_seconds else duration_s,
+            progress=progress,
+        )
+    finally:
+        list_path.unlink(missing_ok=True)
+    return output_path
+
+
+async def generate_scene_images(prompts: dict[Path, str]) -> set[Path]:
+    try:
+        return await agenerate_images(prompts)
+    finally:
+        await aclose_clients()
+
+
+def _asset_name(prefix: str, *parts: str, suffix: str) -> str:
+    return f"{prefix}_{make_key(*parts)[:16]}{suffix}"
+
+
+def render_scene_video(
+    script: str,
+    title: str,
+    workdir: Path,
+    output_path: Path,
+    language: str,
+    voice: str,
+    profile: Optional[EncodeProfile] = None,
+    short: Optional[Rendition] = None,
+    tts_chunks: Optional[dict[str, bytes]] = None,
+    progress: Optional[Callable[[float], None]] = None,
+    subtitle_mode: Optional[str] = None,
+) -> Path:
+    profile = profile or get_profile()
+    scenes = load_scenes(script, title)
+    if not scenes:
+        raise ValueError("Script has no scenes to render")
+    scene_dir = workdir / "scenes"
+    scene_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = scene_dir / MANIFEST_NAME
+    # Assets are named after what they are made from and recorded once a render succeeds, so a re-render
+    # after an edit rebuilds only the images, narration and segments the edit actually changed
+    previous = {name for name in load_json(manifest_path).get("files", []) if (scene_dir / name).exists()}
+    used: set[str] = set()
+
+    def reusable(path: Path) -> bool:
+        used.add(path.name)
+        return path.name in previous
+
+    images = [scene_dir / f"image_{image_key(scene.visual_prompt)[:16]}.png" for scene in scenes]
+    missing = {image: scene.visual_prompt for scene, image in zip(scenes, images) if not reusable(image)}
+    logger.info("Rendering %d scenes, %d new images", len(scenes), len(missing))
+    if missing:
+        # Placeholders stay out of the manifest, so the next render retries those prompts
+        placeholders = asyncio.run(generate_scene_images(missing))
+        used.difference_update(path.name for path in placeholders)
+
+    audio_paths: list[Optional[Path]] = []
+    timed_scenes: list[Scene] = []
+    for scene in scenes:
+        audio_path = None
+        duration = scene.duration_s
+        if scene.narration:
+            audio_path = scene_dir / _asset_name("narration", scene.narration, language, voice, suffix=".mp3")
+            if not reusable(audio_path):
+                # The narration stage hands over its chunks, so this is local work
+                synthesize_voice(scene.narration, audio_path, language=language, voice=voice, store=tts_chunks)
+            duration = mp3_duration(audio_path.read_bytes()) + 0.3
+        audio_paths.append(audio_path)
+        timed_scenes.append(replace(scene, duration_s=duration))
+
+    subtitle_mode = subtitle_mode or os.getenv("SUBTITLE_MODE", "burn")
+    intro_image, outro_image = build_intro_outro(title, profile.size, scene_dir)
+    intro_seconds = float(os.getenv("INTRO_SECONDS", "3"))
+    timeline = build_timestamps(timed_scenes)
+    # The Short is the opening scenes that fit its length, without intro and outro cards
+    short_count = 0
+    if short:
+        short_count = prefix_length([scene.duration_s for scene in timed_scenes], short.max_seconds or float("inf"))
+
+    # Every output gets its own pre-fitted frame, so segment encodes only repeat it and burn subtitles
+    frame_calls: dict[Path, tuple] = {}
+
+    def frame(image: Path, target: EncodeProfile) -> Path:
+        geometry = f"{target.width}x{target.height}:{target.fit}"
+        path = scene_dir / _asset_name("frame", hash_file(image), geometry, suffix=".png")
+        if not reusable(path):
+            frame_calls[path] = (image, target, path)
+        return path
+
+    frames = [frame(image, profile) for image in images]
+    short_frames = [frame(image, short.profile) for image in images[:short_count]] if short else []
+    map_encode(prepare_frame, list(frame_calls.values()))
+
+    def card_output(image: Path) -> SegmentOutput:
+        name = _asset_name("segment", hash_file(image), f"{intro_seconds:.3f}", repr(profile), suffix=".mp4")
+        return SegmentOutput(profile, scene_dir / name, image)
+
+    def scene_output(target: EncodeProfile, scene: Scene, frame_path: Path, audio: str) -> SegmentOutput:
+        burn = subtitle_mode == "burn" and bool(scene.narration or scene.dialogue)
+        key = (
+            hash_file(frame_path), audio, f"{scene.duration_s:.3f}", scene.narration, scene.dialogue, repr(target),
+            str(burn),
+        )
+        output_path = scene_dir / _asset_name("segment", *key, suffix=".mp4")
+        subtitle_path = output_path.with_suffix(".ass") if burn else None
+        if subtitle_path and not reusable(output_path):
+            used.add(subtitle_path.name)
+            # Burnt in during the segment encode itself, so no extra pass over the video
+            write_subtitles(build_cues([(scene, 0.0, scene.duration_s)]), subtitle_path, target.size)
+        return SegmentOutput(target, output_path, frame_path, subtitle_path)
+
+    full_segments = [card_output(intro_image)]
+    short_segments = []
+    calls: list[tuple] = []
+    scheduled: set[Path] = set()
+    changed = 0
+    for position, (scene, _start, _end) in enumerate(timeline):
+        audio_path = audio_paths[position]
+        audio = hash_file(audio_path) if audio_path else ""
+        outputs = [scene_output(profile, scene, frames[position], audio)]
+        if position < short_count:
+            outputs.append(scene_output(short.profile, scene, short_frames[position], audio))
+            short_segments.append(outputs[-1])
+        full_segments.append(outputs[0])
+        # Repeated scenes map to the same segment file, which is encoded once
+        pending = [
+            output for output in outputs if not reusable(output.output_path) and output.output_path not in scheduled
+        ]
+        scheduled.update(output.output_path for output in pending)
+        if pending:
+            changed += 1
+            calls.append((audio_path, scene.duration_s, pending))
+    full_segments.append(card_output(outro_image))
+    for card in (full_segments[0], full_segments[-1]):
+        if not reusable(card.output_path):
+            calls.append((None, intro_seconds, [card]))
+
+    # The full-length track is kept next to the video for caption upload in every mode except "none"
+    track = short_track = None
+    if subtitle_mode != "none":
+        track = write_subtitles(build_cues(timeline, offset=intro_seconds), output_path.with_name("subtitles.srt"))
+        if short:
+            limit = short.max_seconds or float("inf")
+            short_cues = [
+                replace(cue, end=min(cue.end, limit)) for cue in build_cues(timeline[:short_count]) if cue.start < limit
+            ]
+            short_track = write_subtitles(short_cues, short.output_path.with_name("short_subtitles.srt"))
+
+    def phase(start: float, end: float) -> Optional[Callable[[float], None]]:
+        # Segment encodes cover most of the reported progress; the stream-copy concats the rest
+        return (lambda fraction: progress(start + (end - start) * fraction)) if progress else None
+
+    logger.info("Encoding %d of %d scenes", changed, len(scenes))
+    map_encode(
+        encode_segment, calls, progress=phase(0.0, 0.9), weights=[call[1] * len(call[2]) for call in calls]
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    soft = subtitle_mode == "soft"
+    # Sound effects land on their scene's start in each cut; the full video is offset by the intro card
+    concat_segments(
+        [segment.output_path for segment in full_segments],
+        output_path,
+        subtitle_path=track if soft else None,
+        mix=default_mix(sfx_cues(timeline, offset=intro_seconds)),
+        duration_s=timeline[-1][2] + 2 * intro_seconds,
+        progress=phase(0.9, 0.95 if short else 1.0),
+    )
+    if short:
+        concat_segments(
+            [segment.output_path for segment in short_segments],
+            short.output_path,
+            subtitle_path=short_track if soft else None,
+            mix=default_mix(sfx_cues(timeline[:short_count])),
+            # The prefix keeps at least one scene, so an opening longer than the limit is cut here
+            max_seconds=short.max_seconds,
+            duration_s=timeline[short_count - 1][2],
+            progress=phase(0.95, 1.0),
+        )
+    if progress:
+        progress(1.0)
+
+    short_settings = None
+    if short:
+        short_settings = {
+            "profile": short.profile.name,
+            "output": short.output_path.name,
+            "max_seconds": short.max_seconds,
+        }
+    save_json(
+        manifest_path,
+        {
+            "title": title,
+            "language": language,
+            "voice": voice,
+            "profile": profile.name,
+            "output": output_path.name,
+            "short": short_settings,
+            "subtitle_mode": subtitle_mode,
+            "scenes": [
+                {"title": scene.title, "image": image.name, "audio": audio.name if audio else None}
+                for scene, image, audio in zip(timed_scenes, images, audio_paths)
+            ],
+            "files": sorted(used),
+        },
+    )
+    for name in previous - used:
+        (scene_dir / name).unlink(missing_ok=True)
+    return output_path
+
+
+def rerender_scene_video(workdir: Path) -> Path:
+    manifest = load_json(workdir / "scenes" / MANIFEST_NAME)
+    if not manifest:
+        raise ValueError(f"{workdir} has no scene manifest; only scenes render mode runs can be re-rendered")
+    short = None
+    if manifest["short"]:
+        settings = manifest["short"]
+        short = Rendition(get_profile(settings["profile"]), workdir / settings["output"], settings["max_seconds"])
+    script = (workdir / "script.txt").read_text(encoding="utf-8")
+    output_path = render_scene_video(
+        script,
+        manifest["title"],
+        workdir,
+        workdir / manifest["output"],
+        language=manifest["language"],
+        voice=manifest["voice"],
+        profile=get_profile(manifest["profile"]),
+        short=short,
+        # Burned-in or soft subtitles follow the original run, not whatever the current environment says
+        subtitle_mode=manifest.get("subtitle_mode"),
+    )
+    # The narration artifact and its timings follow the edit too; scene MP3s are plain MPEG frames and join
+    # byte-wise, and each scene ends on a sentence boundary, so scenes stand in for TTS chunks in the timings
+    scene_dir = workdir / "scenes"
+    entries = load_json(scene_dir / MANIFEST_NAME)["scenes"]
+    narrated = [
+        (scene.narration, (scene_dir / entry["audio"]).read_bytes())
+        for scene, entry in zip(load_scenes(script, manifest["title"]), entries)
+        if entry["audio"]
+    ]
+    write_mp3([audio for _, audio in narrated], workdir / "narration.mp3")
+    save_json(
+        workdir / "narration_timings.json",
+        {"chunks": [{"text": text, "seconds": round(mp3_duration(audio), 3)} for text, audio in narrated]},
+    )
+    # The edited artifacts supersede any half-finished run, which must not resume on top of them
+    (workdir / CHECKPOINT_NAME).unlink(missing_ok=True)
+    return output_path
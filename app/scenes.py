@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Iterable
 
@@ -19,6 +20,11 @@ def _parse_line_value(line: str) -> str:
     return line.split(":", 1)[1].strip()
 
 
+def _parse_duration(value: str | None, default_duration_s: float) -> float:
+    match = re.search(r"\d+(?:\.\d+)?", value or "")
+    return float(match.group()) if match else default_duration_s
+
+
 def parse_scenes(script: str, default_duration_s: float) -> list[Scene]:
     scenes: list[Scene] = []
     current: dict[str, str] = {}
@@ -46,7 +52,7 @@ def _build_scene(data: dict[str, str], default_duration_s: float) -> Scene:
         title=data.get("title", "Scene"),
         narration=data.get("narration", data.get("story", "")),
         dialogue=data.get("dialogue", ""),
-        duration_s=float(data.get("duration", default_duration_s)),
+        duration_s=_parse_duration(data.get("duration"), default_duration_s),
         visual_prompt=data.get("visual", "Cinematic Telugu scene"),
         sfx=data.get("sfx", ""),
     )
@@ -1,12 +1,52 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+import re
+from typing import Any, Iterator, Optional
 
+from pydantic import Field
+
+from app.cache import get_cache, make_key
+from app.clients import get_async_openai_client, get_openai_client
+from app.rate_limit import athrottle, estimate_tokens, throttle
 from app.retry_utils import with_retry
+from app.seo import VideoMetadata, generate_metadata
 
 logger = logging.getLogger(__name__)
 
+_SECTION_BREAK = re.compile(r"\n\s*\n")
+# Rough Telugu narration budget used to reserve tokens/min before a request
+_COMPLETION_TOKENS_PER_MINUTE = 800
+
+
+_PACKAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "script": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["script", "title", "description", "tags"],
+    "additionalProperties": False,
+}
+
+
+class ScriptPackage(VideoMetadata):
+    script: str = Field(min_length=1)
+
+    def metadata_json(self) -> str:
+        return json.dumps(self.model_dump(exclude={"script"}), ensure_ascii=False, indent=2)
+
+
+def _placeholder_script(topic: str) -> str:
+    return (
+        f"{topic} పై తెలుగు స్క్రిప్ట్. "
+        "ఇది డెమో కంటెంట్. OPENAI_API_KEY సెట్ చేయండి."
+    )
+
 
 def _build_prompt(
     topic: str,
@@ -15,7 +55,14 @@ def _build_prompt(
     video_type: str,
     short_duration: int,
     full_duration: int,
+    scene_format: bool = False,
 ) -> str:
+    structure = (
+        "Split the script into scenes. Start each scene with a line 'Scene N: <title>' followed by lines "
+        "'Narration: ...', 'Visual: <English image prompt>', 'Duration: <seconds>' and optionally 'SFX: ...'."
+        if scene_format
+        else "Provide structured script with intro, main points, and outro."
+    )
     return (
         "You are a Telugu script writer for a YouTube channel. "
         "Write in natural, friendly Telugu suitable for all ages. "
@@ -26,30 +73,23 @@ def _build_prompt(
         f"Video type: {video_type}. "
         f"Short duration: {short_duration} minutes. "
         f"Full duration: {full_duration} minutes. "
-        "Provide structured script with intro, main points, and outro."
+        f"{structure}"
     )
 
 
-@with_retry(attempts=3, wait_seconds=2, backoff=2)
-def generate_script(
+def _script_request(
     topic: str,
     style: str,
     language: str,
     video_type: str,
     short_duration: int,
     full_duration: int,
-) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    scene_format: bool = False,
+) -> tuple[Optional[str], dict[str, Any], str]:
+    # Returns a ready script (placeholder or cached) or the request to send; callers differ only in the client
+    if not os.getenv("OPENAI_API_KEY"):
         logger.warning("OPENAI_API_KEY missing, returning placeholder script")
-        return (
-            f"{topic} పై తెలుగు స్క్రిప్ట్. "
-            "ఇది డెమో కంటెంట్. OPENAI_API_KEY సెట్ చేయండి."
-        )
-
-    from openai import OpenAI
-
-    client = OpenAI(api_key=api_key)
+        return _placeholder_script(topic), {}, ""
     prompt = _build_prompt(
         topic=topic,
         style=style,
@@ -57,10 +97,170 @@ def generate_script(
         video_type=video_type,
         short_duration=short_duration,
         full_duration=full_duration,
+        scene_format=scene_format,
     )
+    request = {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+    }
+    cache_key = make_key("script", request["model"], prompt)
+    cache = get_cache()
+    cached = cache.get_bytes(cache_key, ".txt") if cache else None
+    if cached is not None:
+        logger.info("Using cached script")
+    return cached.decode("utf-8") if cached is not None else None, request, cache_key
+
+
+def _script_tokens(request: dict[str, Any], full_duration: int) -> int:
+    return estimate_tokens(request["messages"][0]["content"], _COMPLETION_TOKENS_PER_MINUTE * full_duration)
+
+
+def _store_script(cache_key: str, script: str) -> str:
+    cache = get_cache()
+    if cache:
+        cache.put_bytes(cache_key, script.encode("utf-8"), ".txt")
+    return script
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="openai")
+def generate_script(
+    topic: str,
+    style: str,
+    language: str,
+    video_type: str,
+    short_duration: int,
+    full_duration: int,
+    scene_format: bool = False,
+) -> str:
+    script, request, cache_key = _script_request(
+        topic, style, language, video_type, short_duration, full_duration, scene_format
+    )
+    if script is not None:
+        return script
+    throttle("openai", tokens=_script_tokens(request, full_duration))
+    response = get_openai_client(os.environ["OPENAI_API_KEY"]).chat.completions.create(**request)
+    return _store_script(cache_key, response.choices[0].message.content.strip())
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="openai")
+async def agenerate_script(
+    topic: str,
+    style: str,
+    language: str,
+    video_type: str,
+    short_duration: int,
+    full_duration: int,
+    scene_format: bool = False,
+) -> str:
+    script, request, cache_key = _script_request(
+        topic, style, language, video_type, short_duration, full_duration, scene_format
+    )
+    if script is not None:
+        return script
+    await athrottle("openai", tokens=_script_tokens(request, full_duration))
+    response = await get_async_openai_client(os.environ["OPENAI_API_KEY"]).chat.completions.create(**request)
+    return _store_script(cache_key, response.choices[0].message.content.strip())
+
+
+def split_sections(text: str) -> list[str]:
+    return [section.strip() for section in _SECTION_BREAK.split(text) if section.strip()]
+
+
+def stream_script(
+    topic: str,
+    style: str,
+    language: str,
+    video_type: str,
+    short_duration: int,
+    full_duration: int,
+    scene_format: bool = False,
+) -> Iterator[str]:
+    script, request, cache_key = _script_request(
+        topic, style, language, video_type, short_duration, full_duration, scene_format
+    )
+    if script is not None:
+        yield from split_sections(script)
+        return
+
+    throttle("openai", tokens=_script_tokens(request, full_duration))
+    stream = get_openai_client(os.environ["OPENAI_API_KEY"]).chat.completions.create(**request, stream=True)
+    parts: list[str] = []
+    buffer = ""
+    for chunk in stream:
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        delta = chunk.choices[0].delta.content
+        parts.append(delta)
+        buffer += delta
+        # Everything before the last blank line is a finished section
+        *complete, buffer = _SECTION_BREAK.split(buffer)
+        for section in complete:
+            if section.strip():
+                yield section.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+    _store_script(cache_key, "".join(parts).strip())
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="openai")
+def _request_package(prompt: str, model: str, api_key: str, completion_tokens: int) -> ScriptPackage:
+    throttle("openai", tokens=estimate_tokens(prompt, completion_tokens))
+    client = get_openai_client(api_key)
     response = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "video_package", "strict": True, "schema": _PACKAGE_SCHEMA},
+        },
     )
-    return response.choices[0].message.content.strip()
+    return ScriptPackage.model_validate_json(response.choices[0].message.content)
+
+
+def generate_script_package(
+    topic: str,
+    style: str,
+    language: str,
+    video_type: str,
+    short_duration: int,
+    full_duration: int,
+    scene_format: bool = False,
+) -> tuple[str, str]:
+    script_args = {
+        "topic": topic,
+        "style": style,
+        "language": language,
+        "video_type": video_type,
+        "short_duration": short_duration,
+        "full_duration": full_duration,
+        "scene_format": scene_format,
+    }
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        prompt = _build_prompt(**script_args) + (
+            " Also write YouTube SEO metadata for the video: a title under 100 characters, "
+            "a description and a list of tags."
+        )
+        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        cache = get_cache()
+        cache_key = make_key("script_package", model, prompt)
+        cached = cache.get_bytes(cache_key, ".json") if cache else None
+        try:
+            if cached is not None:
+                logger.info("Using cached script package")
+                package = ScriptPackage.model_validate_json(cached)
+            else:
+                package = _request_package(
+                    prompt, model, api_key, _COMPLETION_TOKENS_PER_MINUTE * full_duration + 500
+                )
+                if cache:
+                    cache.put_bytes(cache_key, package.model_dump_json().encode("utf-8"), ".json")
+            return package.script.strip(), package.metadata_json()
+        except Exception as exc:
+            logger.warning("Structured script generation failed, using separate calls: %s", exc)
+
+    script = generate_script(**script_args)
+    return script, generate_metadata(topic, script)
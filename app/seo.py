@@ -3,12 +3,48 @@ from __future__ import annotations
 import json
 import logging
 import os
+from typing import Any, Optional
 
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from app.clients import get_async_openai_client, get_openai_client
+from app.rate_limit import athrottle, estimate_tokens, throttle
 from app.retry_utils import with_retry
 
 logger = logging.getLogger(__name__)
 
 
+class VideoMetadata(BaseModel):
+    title: str = Field(min_length=1)
+    description: str = ""
+    tags: str = ""
+
+    @field_validator("title")
+    @classmethod
+    def _limit_title(cls, value: str) -> str:
+        # YouTube rejects titles over 100 characters
+        return value.strip()[:100]
+
+    @field_validator("description")
+    @classmethod
+    def _limit_description(cls, value: str) -> str:
+        return value.strip()[:5000]
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def _join_tags(cls, value: Any) -> str:
+        tags = value if isinstance(value, list) else str(value or "").split(",")
+        cleaned = [str(tag).strip().lstrip("#") for tag in tags if str(tag).strip()]
+        joined = ""
+        for tag in cleaned:
+            candidate = f"{joined},{tag}" if joined else tag
+            # YouTube caps the combined tag length at 500 characters
+            if len(candidate) > 500:
+                break
+            joined = candidate
+        return joined
+
+
 def _fallback_metadata(topic: str) -> dict[str, str]:
     return {
         "title": f"{topic} | తెలుగు వివరణ",
@@ -17,24 +53,69 @@ def _fallback_metadata(topic: str) -> dict[str, str]:
     }
 
 
-@with_retry(attempts=3, wait_seconds=2, backoff=2)
-def generate_metadata(topic: str, script: str) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        logger.warning("OPENAI_API_KEY missing, using fallback metadata")
-        return json.dumps(_fallback_metadata(topic), ensure_ascii=False, indent=2)
+def _strip_code_fence(raw: str) -> str:
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+
+def parse_metadata(raw: str, topic: str) -> str:
+    try:
+        metadata = VideoMetadata.model_validate_json(_strip_code_fence(raw))
+    except ValidationError as exc:
+        logger.warning("Model returned invalid metadata, using fallback: %s", exc.errors()[0]["msg"])
+        metadata = VideoMetadata(**_fallback_metadata(topic))
+    return json.dumps(metadata.model_dump(), ensure_ascii=False, indent=2)
+
 
-    from openai import OpenAI
+def short_metadata(metadata: str) -> str:
+    # The derived Short reuses the full video's metadata; "#Shorts" in the title helps YouTube classify it
+    payload = json.loads(metadata)
+    suffix = " #Shorts"
+    payload["title"] = payload["title"][:100 - len(suffix)].rstrip() + suffix
+    payload["tags"] = ["shorts", *str(payload.get("tags", "")).split(",")]
+    return json.dumps(VideoMetadata(**payload).model_dump(), ensure_ascii=False, indent=2)
 
-    client = OpenAI(api_key=api_key)
+
+def _metadata_request(topic: str, script: str) -> tuple[Optional[str], dict[str, Any]]:
+    # Returns fallback metadata or the request to send; callers differ only in the client
+    if not os.getenv("OPENAI_API_KEY"):
+        logger.warning("OPENAI_API_KEY missing, using fallback metadata")
+        return json.dumps(_fallback_metadata(topic), ensure_ascii=False, indent=2), {}
     prompt = (
         "Generate SEO metadata for a Telugu YouTube video. "
         "Return JSON with title, description, tags. "
         f"Topic: {topic}. Script: {script[:500]}"
     )
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.6,
-    )
-    return response.choices[0].message.content.strip()
+    return None, {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.6,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _metadata_tokens(request: dict[str, Any]) -> int:
+    return estimate_tokens(request["messages"][0]["content"], 500)
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="openai")
+def generate_metadata(topic: str, script: str) -> str:
+    metadata, request = _metadata_request(topic, script)
+    if metadata is not None:
+        return metadata
+    throttle("openai", tokens=_metadata_tokens(request))
+    response = get_openai_client(os.environ["OPENAI_API_KEY"]).chat.completions.create(**request)
+    return parse_metadata(response.choices[0].message.content, topic)
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="openai")
+async def agenerate_metadata(topic: str, script: str) -> str:
+    metadata, request = _metadata_request(topic, script)
+    if metadata is not None:
+        return metadata
+    await athrottle("openai", tokens=_metadata_tokens(request))
+    response = await get_async_openai_client(os.environ["OPENAI_API_KEY"]).chat.completions.create(**request)
+    return parse_metadata(response.choices[0].message.content, topic)
@@ -1,48 +1,127 @@
 from __future__ import annotations
 
 import logging
+import re
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable
 
-from PIL import Image, ImageDraw, ImageFont
+from app.scenes import Scene
+from app.text_render import font_path, get_font
 
 logger = logging.getLogger(__name__)
 
+# Two lines of roughly 42 characters keep cues readable on both 16:9 and 9:16 frames
+_MAX_CUE_CHARS = 84
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
 
-def render_subtitle(text: str, size: tuple[int, int]) -> Path:
+
+@dataclass
+class Cue:
+    start: float
+    end: float
+    text: str
+
+
+def _split_cue_text(text: str) -> list[str]:
+    pieces: list[str] = []
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        current = ""
+        for word in sentence.split():
+            if current and len(current) + 1 + len(word) > _MAX_CUE_CHARS:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            pieces.append(current)
+    return pieces
+
+
+def build_cues(timeline: Iterable[tuple[Scene, float, float]], offset: float = 0.0) -> list[Cue]:
+    cues: list[Cue] = []
+    for scene, start, end in timeline:
+        pieces = _split_cue_text(scene.narration or scene.dialogue)
+        total = sum(len(piece) for piece in pieces)
+        cursor = start
+        # Narration speed is roughly constant, so each piece gets time in proportion to its length
+        for piece in pieces:
+            length = (end - start) * len(piece) / total
+            cues.append(Cue(offset + cursor, offset + cursor + length, piece))
+            cursor += length
+    return cues
+
+
+def _srt_time(seconds: float) -> str:
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    centis = round(seconds * 100)
+    hours, centis = divmod(centis, 360_000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def to_srt(cues: list[Cue]) -> str:
+    return "\n".join(
+        f"{number}\n{_srt_time(cue.start)} --> {_srt_time(cue.end)}\n{cue.text}\n"
+        for number, cue in enumerate(cues, start=1)
+    )
+
+
+def to_ass(cues: list[Cue], size: tuple[int, int]) -> str:
     width, height = size
-    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(image)
-    font = ImageFont.load_default()
-    margin = 20
-    max_width = width - 2 * margin
-    lines = _wrap_text(text, font, max_width, draw)
-    y = height - margin - (len(lines) * 14)
-    for line in lines:
-        text_width = draw.textlength(line, font=font)
-        x = (width - text_width) / 2
-        draw.rectangle(
-            (x - 10, y - 2, x + text_width + 10, y + 14),
-            fill=(0, 0, 0, 180),
-        )
-        draw.text((x, y), line, fill=(255, 255, 255, 255), font=font)
-        y += 16
-    output_path = Path("subtitles") / f"subtitle_{abs(hash(text))}.png"
+    font_size = max(16, min(width, height) // 20)
+    font_name = get_font(font_size).getname()[0]
+    # BorderStyle 3 draws the semi-transparent box (OutlineColour) the PNG overlays used to have
+    header = (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 0\n"
+        "ScaledBorderAndShadow: yes\n\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, "
+        "Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{font_name},{font_size},&H00FFFFFF,&H000000FF,&H4B000000,&H4B000000,0,0,0,0,"
+        "100,100,0,0,3,8,0,2,30,30,30,1\n\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    events = "".join(
+        f"Dialogue: 0,{_ass_time(cue.start)},{_ass_time(cue.end)},Default,,0,0,0,,"
+        f"{cue.text.replace('{', '(').replace('}', ')')}\n"
+        for cue in cues
+    )
+    return header + events
+
+
+def write_subtitles(cues: list[Cue], output_path: Path, size: tuple[int, int] = (1280, 720)) -> Path:
+    content = to_ass(cues, size) if output_path.suffix == ".ass" else to_srt(cues)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output_path)
+    output_path.write_text(content, encoding="utf-8")
     return output_path
 
 
-def _wrap_text(text: str, font: ImageFont.ImageFont, max_width: int, draw: ImageDraw.ImageDraw) -> list[str]:
-    words = text.split()
-    lines: list[str] = []
-    current: list[str] = []
-    for word in words:
-        current.append(word)
-        width = draw.textlength(" ".join(current), font=font)
-        if width > max_width:
-            current.pop()
-            lines.append(" ".join(current))
-            current = [word]
-    if current:
-        lines.append(" ".join(current))
-    return lines
+def _escape_filter_value(value: str) -> str:
+    # Escaped once for the filter option parser and once more for the filtergraph parser
+    value = value.replace("\\", "\\\\").replace(":", "\\:").replace("'", "\\'")
+    for char in "\\'[],;":
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def burn_filter(subtitle_path: Path) -> str:
+    options = f"filename={_escape_filter_value(str(subtitle_path.resolve()))}"
+    fonts = font_path()
+    if fonts:
+        options += f":fontsdir={_escape_filter_value(str(Path(fonts).parent))}"
+    return f"subtitles={options}"
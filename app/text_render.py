@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import functools
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from PIL import ImageFont, features
+
+logger = logging.getLogger(__name__)
+
+# Debian/Ubuntu paths from fonts-noto-core; DejaVu has no Telugu glyphs but keeps Latin text legible
+_FONT_CANDIDATES = {
+    False: (
+        "/usr/share/fonts/truetype/noto/NotoSansTelugu-Regular.ttf",
+        "/usr/share/fonts/opentype/noto/NotoSansTelugu-Regular.ttf",
+        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ),
+    True: (
+        "/usr/share/fonts/truetype/noto/NotoSansTelugu-Bold.ttf",
+        "/usr/share/fonts/opentype/noto/NotoSansTelugu-Bold.ttf",
+        "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _layout_engine() -> Any:
+    if features.check("raqm"):
+        return ImageFont.Layout.RAQM
+    logger.warning("libraqm not available, Telugu text will be drawn without glyph shaping")
+    return ImageFont.Layout.BASIC
+
+
+@functools.lru_cache(maxsize=None)
+def font_path(bold: bool = False) -> str | None:
+    configured = os.getenv("FONT_BOLD_PATH" if bold else "FONT_PATH") or os.getenv("FONT_PATH")
+    for candidate in (configured, *_FONT_CANDIDATES[bold]):
+        if candidate and Path(candidate).is_file():
+            return candidate
+    logger.warning("No TrueType font found, set FONT_PATH to a Telugu font such as Noto Sans Telugu")
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size: int, bold: bool = False) -> Any:
+    path = font_path(bold)
+    if path is None:
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size, layout_engine=_layout_engine())
+
+
+@functools.lru_cache(maxsize=65536)
+def text_width(text: str, size: int, bold: bool = False) -> float:
+    return get_font(size, bold).getlength(text)
+
+
+@functools.lru_cache(maxsize=None)
+def line_height(size: int, bold: bool = False) -> int:
+    font = get_font(size, bold)
+    if hasattr(font, "getmetrics"):
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    return int(size * 1.2)
+
+
+def wrap_text(text: str, size: int, max_width: float, bold: bool = False) -> list[str]:
+    # Each word is measured once (and memoized across calls) instead of re-measuring the growing line
+    space = text_width(" ", size, bold)
+    lines: list[str] = []
+    current: list[str] = []
+    current_width = 0.0
+    for word in text.split():
+        word_width = text_width(word, size, bold)
+        if current and current_width + space + word_width > max_width:
+            lines.append(" ".join(current))
+            current, current_width = [word], word_width
+        else:
+            current_width += (space if current else 0) + word_width
+            current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+
+def draw_centered_text(
+    draw: Any,
+    text: str,
+    size: int,
+    canvas: tuple[int, int],
+    fill: tuple[int, ...],
+    bold: bool = False,
+    margin: int = 60,
+) -> None:
+    width, height = canvas
+    lines = [line for paragraph in text.splitlines() for line in wrap_text(paragraph, size, width - 2 * margin, bold)]
+    step = line_height(size, bold)
+    y = (height - step * len(lines)) / 2
+    font = get_font(size, bold)
+    for line in lines:
+        draw.text(((width - text_width(line, size, bold)) / 2, y), line, fill=fill, font=font)
+        y += step
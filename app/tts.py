@@ -1,23 +1,168 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import logging
+import math
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any, Callable, Optional
 
+from app.cache import get_cache, make_key
+from app.metrics import bind_stage
+from app.rate_limit import throttle
 from app.retry_utils import with_retry
+from app.utils import mp3_duration
 
 logger = logging.getLogger(__name__)
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
 
-@with_retry(attempts=3, wait_seconds=2, backoff=2)
-def synthesize_voice(text: str, output_path: Path, language: str, voice: str) -> None:
-    logger.info("Generating TTS audio")
+
+def split_text(text: str, max_chars: Optional[int] = None) -> list[str]:
+    max_chars = max_chars or int(os.getenv("TTS_CHUNK_CHARS", "400"))
+    chunks: list[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2, upstream="gtts")
+def _synthesize_chunk(text: str, language: str, voice: str) -> bytes:
+    cache = get_cache()
+    cache_key = make_key("tts", text, language, voice)
+    cached = cache.get_bytes(cache_key, ".mp3") if cache else None
+    if cached is not None:
+        return cached
+    # gTTS issues one request per ~100 characters of text
+    throttle("gtts", requests=math.ceil(len(text) / 100))
     try:
         from gtts import gTTS
         from gtts.tts import gTTSError
 
-        tts = gTTS(text=text, lang=language, tld=voice)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        tts.save(str(output_path))
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, tld=voice).write_to_fp(buffer)
     except gTTSError as exc:
         logger.error("TTS generation failed: %s", exc)
         raise RuntimeError("Failed to generate TTS audio") from exc
+    data = buffer.getvalue()
+    if cache:
+        cache.put_bytes(cache_key, data, ".mp3")
+    return data
+
+
+def synthesize_chunks(
+    text: str,
+    language: str,
+    voice: str,
+    progress: Optional[Callable[[dict[str, Any]], None]] = None,
+    store: Optional[dict[str, bytes]] = None,
+) -> list[bytes]:
+    chunks = split_text(text)
+    if not chunks:
+        raise ValueError("No text to synthesize")
+    # The store hands chunks between callers of one run (prefetch, narration, scenes) without the disk cache
+    store = {} if store is None else store
+    missing = [chunk for chunk in dict.fromkeys(chunks) if chunk not in store]
+    if missing:
+        workers = max(1, int(os.getenv("TTS_WORKERS", "4")))
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing)), thread_name_prefix="tts") as executor:
+            synthesize = bind_stage(_synthesize_chunk)
+            futures = {executor.submit(synthesize, chunk, language, voice): chunk for chunk in missing}
+            for done, future in enumerate(as_completed(futures), start=len(chunks) - len(missing) + 1):
+                store[futures[future]] = future.result()
+                if progress:
+                    progress({"type": "tts_chunk", "done": done, "total": len(chunks)})
+    return [store[chunk] for chunk in chunks]
+
+
+async def asynthesize_chunks(
+    text: str,
+    language: str,
+    voice: str,
+    progress: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> list[bytes]:
+    # gTTS only has a blocking client, so the awaitable variant runs the same TTS_WORKERS pool off the event loop
+    return await asyncio.to_thread(synthesize_chunks, text, language, voice, progress)
+
+
+class ChunkPrefetcher:
+    def __init__(self, language: str, voice: str) -> None:
+        self.language = language
+        self.voice = voice
+        workers = max(1, int(os.getenv("TTS_WORKERS", "4")))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-prefetch")
+        self._futures: dict[str, Future] = {}
+
+    def submit(self, text: str) -> None:
+        synthesize = bind_stage(_synthesize_chunk)
+        for chunk in split_text(text):
+            if chunk not in self._futures:
+                self._futures[chunk] = self._executor.submit(synthesize, chunk, self.language, self.voice)
+
+    def wait(self) -> dict[str, bytes]:
+        # Failed chunks are left out and go through the regular synthesis path, which retries them
+        chunks = {}
+        for chunk, future in self._futures.items():
+            if future.exception() is not None:
+                logger.warning("TTS prefetch failed: %s", future.exception())
+            else:
+                chunks[chunk] = future.result()
+        self._executor.shutdown(wait=True)
+        return chunks
+
+
+def write_mp3(parts: list[bytes], output_path: Path) -> None:
+    # gTTS output is plain MPEG frames, so chunks join byte-wise without re-encoding
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".part")
+    with tmp_path.open("wb") as handle:
+        for part in parts:
+            handle.write(part)
+    tmp_path.replace(output_path)
+
+
+def chunk_timings(text: str, parts: list[bytes]) -> list[tuple[str, float]]:
+    # Chunk boundaries are sentence boundaries, which makes them safe places to cut a shorter edit
+    return [(chunk, round(mp3_duration(part), 3)) for chunk, part in zip(split_text(text), parts)]
+
+
+def synthesize_voice(
+    text: str,
+    output_path: Path,
+    language: str,
+    voice: str,
+    progress: Optional[Callable[[dict[str, Any]], None]] = None,
+    store: Optional[dict[str, bytes]] = None,
+) -> list[tuple[str, float]]:
+    logger.info("Generating TTS audio")
+    parts = synthesize_chunks(text, language, voice, progress=progress, store=store)
+    write_mp3(parts, output_path)
+    return chunk_timings(text, parts)
+
+
+async def asynthesize_voice(
+    text: str,
+    output_path: Path,
+    language: str,
+    voice: str,
+    progress: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> list[tuple[str, float]]:
+    logger.info("Generating TTS audio")
+    parts = await asynthesize_chunks(text, language, voice, progress=progress)
+    await asyncio.to_thread(write_mp3, parts, output_path)
+    return chunk_timings(text, parts)
@@ -1,42 +1,146 @@
 from __future__ import annotations
 
+import fcntl
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
 
+from app.clients import get_youtube_service
 from app.retry_utils import with_retry
-from app.utils import decrypt_file, encrypt_file
+from app.utils import load_json, save_json
 
 logger = logging.getLogger(__name__)
 
-SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
-
-
-def _load_credentials(client_secret_path: Path, token_path: Path):
-    if not client_secret_path.exists():
-        raise FileNotFoundError("client_secret.json not found")
-
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-
-    encryption_key = os.getenv("YOUTUBE_TOKEN_KEY")
-    if token_path.exists() and encryption_key:
-        decrypted = decrypt_file(token_path, encryption_key)
-        token_data = json.loads(decrypted.decode("utf-8"))
-        return Credentials.from_authorized_user_info(token_data, SCOPES)
+# YouTube Data API quota cost per call
+VIDEO_INSERT_UNITS = 1600
+THUMBNAIL_SET_UNITS = 50
+_CHUNK_ALIGNMENT = 256 * 1024
+
+
+@dataclass
+class UploadJob:
+    video_path: Path
+    metadata_path: Path
+    thumbnail_path: Path
+
+
+class QuotaBudget:
+    def __init__(self, units: int, ledger: Optional[Path] = None) -> None:
+        # With a ledger file the units spent are kept per UTC day, so the budget holds across runs
+        self.units = units
+        self.ledger = ledger
+        self._spent: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[dict[str, Any]]:
+        with self._lock:
+            if self.ledger is None:
+                yield self._spent
+                return
+            self.ledger.parent.mkdir(parents=True, exist_ok=True)
+            # Concurrent batch runs share the ledger, so the read-modify-write holds a file lock
+            with self.ledger.with_name(f"{self.ledger.name}.lock").open("a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    state = load_json(self.ledger)
+                    yield state
+                    save_json(self.ledger, state)
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _today(self, state: dict[str, Any]) -> int:
+        day = datetime.now(timezone.utc).date().isoformat()
+        if state.get("day") != day:
+            state.clear()
+            state.update(day=day, spent=0)
+        return state["spent"]
+
+    @property
+    def remaining(self) -> int:
+        with self._locked() as state:
+            return self.units - self._today(state)
+
+    def reserve(self, units: int) -> bool:
+        with self._locked() as state:
+            spent = self._today(state)
+            if spent + units > self.units:
+                return False
+            state["spent"] = spent + units
+            return True
+
+
+def _chunk_size() -> int:
+    requested = int(float(os.getenv("YOUTUBE_UPLOAD_CHUNK_MB", "8")) * 1024 * 1024)
+    return max(_CHUNK_ALIGNMENT, requested // _CHUNK_ALIGNMENT * _CHUNK_ALIGNMENT)
+
+
+def _session_path(video_path: Path) -> Path:
+    return video_path.with_name(f"{video_path.name}.upload.json")
+
+
+def _log_progress(fraction: float) -> None:
+    logger.info("Upload %d%% complete", int(fraction * 100))
+
+
+def _session_status(request: Any, resumable_uri: str, size: int) -> tuple[Optional[int], Optional[dict[str, Any]]]:
+    # The resumable protocol's status query: an empty PUT answers with the bytes the server holds (308),
+    # the finished video (200/201) or an error once the session has expired
+    response, content = request.http.request(
+        resumable_uri, method="PUT", headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+    )
+    if response.status in (200, 201):
+        return size, json.loads(content)
+    if response.status == 308:
+        received = response.get("range")
+        return int(received.rsplit("-", 1)[1]) + 1 if received else 0, None
+    logger.warning("Stored upload session is no longer valid (HTTP %s), starting over", response.status)
+    return None, None
 
-    if token_path.exists() and not encryption_key:
-        token_data = json.loads(token_path.read_text(encoding="utf-8"))
-        return Credentials.from_authorized_user_info(token_data, SCOPES)
 
-    flow = InstalledAppFlow.from_client_secrets_file(str(client_secret_path), SCOPES)
-    creds = flow.run_local_server(port=0)
-    token_path.write_text(creds.to_json(), encoding="utf-8")
-    if encryption_key:
-        encrypt_file(token_path, encryption_key)
-        logger.info("Encrypted YouTube token file")
-    return creds
+def _resumable_upload(
+    make_request: Callable[[], Any],
+    video_path: Path,
+    progress: Callable[[float], None],
+) -> dict[str, Any]:
+    session_path = _session_path(video_path)
+    stat = video_path.stat()
+    fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+    state = load_json(session_path)
+    if state.get("video") != fingerprint:
+        state = {"video": fingerprint}
+
+    request = make_request()
+    response = None
+    if state.get("resumable_uri"):
+        logger.info("Resuming upload session for %s", video_path.name)
+        offset, response = _session_status(request, state["resumable_uri"], stat.st_size)
+        if offset is None:
+            state = {"video": fingerprint}
+        else:
+            # A fresh request continues the stored session from the first byte the server is missing
+            request.resumable_uri = state["resumable_uri"]
+            request.resumable_progress = offset
+            progress(offset / stat.st_size if stat.st_size else 1.0)
+
+    while response is None:
+        status, response = request.next_chunk(num_retries=3)
+        if request.resumable_uri and request.resumable_uri != state.get("resumable_uri"):
+            state["resumable_uri"] = request.resumable_uri
+            save_json(session_path, state)
+        if status:
+            progress(status.progress())
+
+    session_path.unlink(missing_ok=True)
+    progress(1.0)
+    return response
 
 
 @with_retry(attempts=3, wait_seconds=2, backoff=2)
@@ -46,34 +150,35 @@ def upload_video(
     thumbnail_path: Path,
     client_secret_path: Path,
     token_path: Path,
-) -> None:
+    progress: Optional[Callable[[float], None]] = None,
+) -> str:
     if not video_path.exists():
         raise FileNotFoundError("video.mp4 not found")
     if not metadata_path.exists():
         raise FileNotFoundError("metadata.json not found")
 
-    from googleapiclient.discovery import build
     from googleapiclient.http import MediaFileUpload
 
-    creds = _load_credentials(client_secret_path, token_path)
-    service = build("youtube", "v3", credentials=creds)
+    service = get_youtube_service(client_secret_path, token_path)
     metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
-
-    request = service.videos().insert(
-        part="snippet,status",
-        body={
-            "snippet": {
-                "title": metadata.get("title"),
-                "description": metadata.get("description"),
-                "tags": metadata.get("tags", "").split(","),
-                "categoryId": os.getenv("YOUTUBE_CATEGORY", "27"),
-            },
-            "status": {"privacyStatus": os.getenv("YOUTUBE_PRIVACY", "private")},
+    body = {
+        "snippet": {
+            "title": metadata.get("title"),
+            "description": metadata.get("description"),
+            "tags": metadata.get("tags", "").split(","),
+            "categoryId": os.getenv("YOUTUBE_CATEGORY", "27"),
         },
-        media_body=MediaFileUpload(str(video_path), resumable=True),
-    )
+        "status": {"privacyStatus": os.getenv("YOUTUBE_PRIVACY", "private")},
+    }
 
-    response = request.execute()
+    def make_request() -> Any:
+        return service.videos().insert(
+            part="snippet,status",
+            body=body,
+            media_body=MediaFileUpload(str(video_path), chunksize=_chunk_size(), resumable=True),
+        )
+
+    response = _resumable_upload(make_request, video_path, progress or _log_progress)
     video_id = response.get("id")
     logger.info("Uploaded video with id %s", video_id)
 
@@ -83,3 +188,44 @@ def upload_video(
             media_body=MediaFileUpload(str(thumbnail_path)),
         ).execute()
         logger.info("Thumbnail uploaded")
+    return video_id
+
+
+def upload_many(
+    jobs: list[UploadJob],
+    client_secret_path: Path,
+    token_path: Path,
+    max_concurrent: int = 2,
+    quota: Optional[QuotaBudget] = None,
+) -> list[dict[str, Any]]:
+    quota = quota or QuotaBudget(
+        int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")), ledger=token_path.with_name("youtube_quota.json")
+    )
+
+    def run(job: UploadJob) -> dict[str, Any]:
+        entry: dict[str, Any] = {"video": str(job.video_path)}
+        cost = VIDEO_INSERT_UNITS + (THUMBNAIL_SET_UNITS if job.thumbnail_path.exists() else 0)
+        if not quota.reserve(cost):
+            logger.warning("Skipping %s: YouTube quota budget exhausted", job.video_path)
+            entry.update(status="skipped", error="quota exhausted")
+            return entry
+        try:
+            video_id = upload_video(
+                video_path=job.video_path,
+                metadata_path=job.metadata_path,
+                thumbnail_path=job.thumbnail_path,
+                client_secret_path=client_secret_path,
+                token_path=token_path,
+                progress=lambda fraction: logger.info(
+                    "%s: upload %d%% complete", job.video_path.parent.name, int(fraction * 100)
+                ),
+            )
+        except Exception as exc:
+            logger.exception("Upload failed for %s", job.video_path)
+            entry.update(status="failed", error=str(exc))
+        else:
+            entry.update(status="uploaded", video_id=video_id)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrent), thread_name_prefix="upload") as executor:
+        return list(executor.map(run, jobs))
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import json
+import os
+import re
 import shutil
+import subprocess
+import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
+
+from app.metrics import record_child
 
 
 def load_json(path: Path) -> dict[str, Any]:
@@ -36,3 +42,84 @@ def decrypt_file(path: Path, key: str) -> bytes:
 def ensure_ffmpeg() -> None:
     if not shutil.which("ffmpeg"):
         raise RuntimeError("FFmpeg not found. Please install ffmpeg and retry.")
+
+
+def _wait(process: subprocess.Popen) -> int:
+    # wait4 reports this child's own usage, so concurrent stages are not charged for each other's ffmpeg
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    record_child(usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024)
+    return process.returncode
+
+
+def run_ffmpeg(
+    args: list[str],
+    duration_s: Optional[float] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> None:
+    ensure_ffmpeg()
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args]
+    report = bool(progress and duration_s)
+    if report:
+        # -progress writes key=value blocks; out_time_us is the encoded position
+        command[1:1] = ["-progress", "pipe:1", "-nostats"]
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        stdout = subprocess.PIPE if report else subprocess.DEVNULL
+        with subprocess.Popen(command, stdout=stdout, stderr=stderr, text=True) as process:
+            if report:
+                for line in process.stdout:
+                    key, _, value = line.strip().partition("=")
+                    if key == "out_time_us" and value.isdigit():
+                        progress(min(1.0, int(value) / 1_000_000 / duration_s))
+            if _wait(process) != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"FFmpeg failed: {stderr.read().strip()[-500:]}")
+
+
+def probe_duration(path: Path) -> float:
+    ensure_ffmpeg()
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", str(path)], capture_output=True, text=True
+    )
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    if not match:
+        raise RuntimeError(f"Could not determine duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+# Layer III bitrates in kbit/s, indexed by the 4-bit header field (MPEG-1, then MPEG-2/2.5)
+_MP3_BITRATES = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_duration(data: bytes) -> float:
+    # Walks the MPEG frame headers, so chunk lengths are known without spawning ffmpeg per chunk
+    position = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+        position = 10 + size
+    seconds = 0.0
+    first = True
+    while position + 4 <= len(data):
+        header = int.from_bytes(data[position:position + 4], "big")
+        version = header >> 19 & 0b11
+        bitrate_index = header >> 12 & 0b1111
+        rate_index = header >> 10 & 0b11
+        valid = header >> 21 == 0x7FF and version != 1 and header >> 17 & 0b11 == 1
+        if not valid or bitrate_index in (0, 15) or rate_index == 3:
+            position += 1
+            continue
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        bitrate = _MP3_BITRATES[0 if version == 3 else 1][bitrate_index] * 1000
+        length = samples // 8 * bitrate // sample_rate + (header >> 9 & 1)
+        # An encoder's Xing/Info header frame carries no audio
+        if not (first and (b"Xing" in data[position:position + 64] or b"Info" in data[position:position + 64])):
+            seconds += samples / sample_rate
+        first = False
+        position += length
+    return seconds
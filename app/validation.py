@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
+from app.encoding import get_profile
 from app.tts import synthesize_voice
 from app.utils import ensure_ffmpeg
 
@@ -27,15 +28,21 @@ def validate_video(output_dir: Path) -> Path:
 
     output_dir.mkdir(parents=True, exist_ok=True)
     video_path = output_dir / "video_validation.mp4"
-    clip = ColorClip(size=(640, 360), color=(20, 24, 38)).set_duration(1)
+    profile = get_profile()
+    clip = ColorClip(size=profile.size, color=(20, 24, 38)).set_duration(1)
     audio = AudioClip(lambda t: 0.0, duration=1, fps=44100)
     try:
         video = clip.set_audio(audio)
         video.write_videofile(
             str(video_path),
-            fps=24,
+            temp_audiofile=str(video_path.with_name(f"{video_path.stem}.audio.m4a")),
+            fps=float(profile.fps),
             codec="libx264",
             audio_codec="aac",
+            audio_bitrate=profile.audio_bitrate,
+            preset=profile.preset,
+            threads=profile.thread_count or None,
+            ffmpeg_params=["-crf", str(profile.crf), "-pix_fmt", "yuv420p"],
             verbose=False,
             logger=None,
         )
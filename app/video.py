@@ -1,32 +1,117 @@
 from __future__ import annotations
 
 import logging
+import os
 from pathlib import Path
+from typing import Callable, Optional
 
+from app.cache import get_cache, hash_file, make_key
+from app.encoding import EncodeProfile, Rendition, get_profile
 from app.retry_utils import with_retry
-from app.utils import ensure_ffmpeg
+from app.utils import ensure_ffmpeg, probe_duration, run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+# Containers ffmpeg can mux into MP4 without re-encoding the audio
+_COPYABLE_AUDIO = {".mp3", ".m4a", ".aac"}
 
-@with_retry(attempts=3, wait_seconds=2, backoff=2)
-def create_video(audio_path: Path, image_path: Path, output_path: Path) -> None:
-    logger.info("Building video")
+
+def _still_image_args(audio_path: Path, image_path: Path, renditions: list[Rendition], fps: str) -> list[str]:
+    if audio_path.suffix.lower() in _COPYABLE_AUDIO:
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_args = ["-c:a", "aac", "-b:a", "192k"]
+    # The still image is decoded once and split into one scaled branch per rendition
+    if len(renditions) == 1:
+        graph = [renditions[0].profile.frame_filter("0:v", "v0")]
+    else:
+        graph = ["[0:v]split=" + str(len(renditions)) + "".join(f"[s{index}]" for index in range(len(renditions)))]
+        graph += [rendition.profile.frame_filter(f"s{index}", f"v{index}") for index, rendition in enumerate(renditions)]
+    args = [
+        "-loop", "1",
+        "-framerate", fps,
+        "-i", str(image_path),
+        "-i", str(audio_path),
+        "-filter_complex", ";".join(graph),
+    ]
+    for index, rendition in enumerate(renditions):
+        args += ["-map", f"[v{index}]", "-map", "1:a", *rendition.profile.video_args(fps), *audio_args]
+        if rendition.max_seconds:
+            args += ["-t", f"{rendition.max_seconds:.3f}"]
+        args += ["-shortest", "-movflags", "+faststart", str(rendition.output_path)]
+    return args
+
+
+def _render_ffmpeg(
+    audio_path: Path,
+    image_path: Path,
+    renditions: list[Rendition],
+    progress: Optional[Callable[[float], None]] = None,
+) -> None:
+    fps = os.getenv("STILL_FPS", "2")
+    duration = None
+    if progress:
+        duration = probe_duration(audio_path)
+        if all(rendition.max_seconds for rendition in renditions):
+            duration = min(duration, max(rendition.max_seconds for rendition in renditions))
+    run_ffmpeg(_still_image_args(audio_path, image_path, renditions, fps), duration_s=duration, progress=progress)
+
+
+def fit_image(image_path: Path, profile: EncodeProfile, output_path: Path) -> Path:
+    from PIL import Image, ImageFilter, ImageOps
+
+    with Image.open(image_path) as source:
+        image = source.convert("RGB")
+    cover = ImageOps.fit(image, profile.size)
+    if profile.fit == "blur":
+        cover = cover.filter(ImageFilter.GaussianBlur(20))
+        foreground = ImageOps.contain(image, profile.size)
+        cover.paste(
+            foreground, ((profile.width - foreground.width) // 2, (profile.height - foreground.height) // 2)
+        )
+    cover.save(output_path)
+    return output_path
+
+
+def prepare_frame(image_path: Path, profile: EncodeProfile, output_path: Path) -> Path:
+    # Fitting (and for vertical profiles, blurring) once here keeps per-frame filtering out of the encode
+    cache = get_cache()
+    key = make_key("frame", hash_file(image_path), str(profile.width), str(profile.height), profile.fit)
+    if cache and cache.fetch(key, output_path, ".png"):
+        return output_path
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fit_image(image_path, profile, output_path)
+    if cache:
+        cache.put_file(key, output_path, ".png")
+    return output_path
+
+
+def _render_moviepy(audio_path: Path, image_path: Path, rendition: Rendition) -> None:
     ensure_ffmpeg()
     from moviepy.editor import AudioFileClip, ImageClip
 
+    profile = rendition.profile
+    output_path = rendition.output_path
+    frame_path = fit_image(image_path, profile, output_path.with_name(f"{output_path.stem}.frame.png"))
     audio = None
     image = None
     try:
         audio = AudioFileClip(str(audio_path))
-        image = ImageClip(str(image_path)).set_duration(audio.duration)
+        if rendition.max_seconds and rendition.max_seconds < audio.duration:
+            audio = audio.subclip(0, rendition.max_seconds)
+        image = ImageClip(str(frame_path)).set_duration(audio.duration)
         video = image.set_audio(audio)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         video.write_videofile(
             str(output_path),
-            fps=24,
+            # MoviePy otherwise writes its temporary audio track into the working directory
+            temp_audiofile=str(output_path.with_name(f"{output_path.stem}.audio.m4a")),
+            fps=float(os.getenv("STILL_FPS", "2")),
             codec="libx264",
             audio_codec="aac",
+            audio_bitrate=profile.audio_bitrate,
+            preset=profile.preset,
+            threads=profile.thread_count or None,
+            ffmpeg_params=["-crf", str(profile.crf), "-pix_fmt", "yuv420p"],
             verbose=False,
             logger=None,
         )
@@ -35,3 +120,52 @@ def create_video(audio_path: Path, image_path: Path, output_path: Path) -> None:
             image.close()
         if audio:
             audio.close()
+        frame_path.unlink(missing_ok=True)
+
+
+@with_retry(attempts=3, wait_seconds=2, backoff=2)
+def create_renditions(
+    audio_path: Path,
+    image_path: Path,
+    renditions: list[Rendition],
+    progress: Optional[Callable[[float], None]] = None,
+) -> list[Path]:
+    logger.info("Building video (%s)", ", ".join(rendition.profile.name for rendition in renditions))
+    engine = os.getenv("VIDEO_ENGINE", "ffmpeg")
+    fps = os.getenv("STILL_FPS", "2")
+    cache = get_cache()
+    inputs = (hash_file(audio_path), hash_file(image_path)) if cache else ()
+    pending: list[tuple[Rendition, str]] = []
+    for rendition in renditions:
+        key = make_key("video", *inputs, engine, fps, repr(rendition.profile), str(rendition.max_seconds))
+        if not (cache and cache.fetch(key, rendition.output_path, ".mp4")):
+            rendition.output_path.parent.mkdir(parents=True, exist_ok=True)
+            pending.append((rendition, key))
+    if not pending:
+        return [rendition.output_path for rendition in renditions]
+
+    if engine == "ffmpeg":
+        try:
+            _render_ffmpeg(audio_path, image_path, [rendition for rendition, _ in pending], progress=progress)
+        except RuntimeError as exc:
+            logger.warning("FFmpeg still-image render failed, falling back to MoviePy: %s", exc)
+            for rendition, _ in pending:
+                _render_moviepy(audio_path, image_path, rendition)
+    else:
+        for rendition, _ in pending:
+            _render_moviepy(audio_path, image_path, rendition)
+
+    if cache:
+        for rendition, key in pending:
+            cache.put_file(key, rendition.output_path, ".mp4")
+    return [rendition.output_path for rendition in renditions]
+
+
+def create_video(
+    audio_path: Path,
+    image_path: Path,
+    output_path: Path,
+    progress: Optional[Callable[[float], None]] = None,
+    profile: Optional[EncodeProfile] = None,
+) -> None:
+    create_renditions(audio_path, image_path, [Rendition(profile or get_profile(), output_path)], progress=progress)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import shutil
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = ".lock"
+_SEPARATORS = re.compile(r"-{2,}")
+
+
+def slugify(topic: str, max_length: int = 40) -> str:
+    # Letters, marks (Telugu vowel signs) and digits are kept; punctuation and path characters become "-"
+    kept = "".join(char if unicodedata.category(char)[0] in "LMN" else "-" for char in topic.lower())
+    slug = _SEPARATORS.sub("-", kept).strip("-")
+    return slug[:max_length].rstrip("-") or "job"
+
+
+def workspace_key(topic: str, settings: dict[str, Any]) -> str:
+    payload = json.dumps({"topic": topic, **settings}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def create_workspace(root: Path, topic: str, settings: dict[str, Any]) -> Path:
+    # The content key groups runs of the same request, the token keeps concurrent runs apart
+    prefix = f"{slugify(topic)}-{workspace_key(topic, settings)}"
+    while True:
+        workspace = root / f"{prefix}-{secrets.token_hex(3)}"
+        try:
+            workspace.mkdir(parents=True)
+        except FileExistsError:
+            continue
+        return workspace
+
+
+@contextmanager
+def lock_workspace(workspace: Path) -> Iterator[Path]:
+    workspace.mkdir(parents=True, exist_ok=True)
+    with (workspace / LOCK_NAME).open("a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"Workspace {workspace} is in use by another run") from None
+        try:
+            yield workspace
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _is_locked(workspace: Path) -> bool:
+    with (workspace / LOCK_NAME).open("a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        return False
+
+
+def _usage(workspace: Path) -> tuple[float, int]:
+    last_modified = workspace.stat().st_mtime
+    size = 0
+    for path in workspace.rglob("*"):
+        if path.is_file():
+            stat = path.stat()
+            size += stat.st_size
+            last_modified = max(last_modified, stat.st_mtime)
+    return last_modified, size
+
+
+def collect_workspaces(
+    root: Path,
+    max_age_hours: float | None = None,
+    max_mb: float | None = None,
+    dry_run: bool = False,
+) -> list[Path]:
+    if max_age_hours is None:
+        max_age_hours = float(os.getenv("WORKSPACE_MAX_AGE_HOURS", "168"))
+    if max_mb is None:
+        max_mb = float(os.getenv("WORKSPACE_MAX_MB", "20480"))
+    if not root.is_dir():
+        return []
+
+    # Only directories a pipeline has run in are candidates, and never while a run holds the lock
+    workspaces = []
+    for workspace in root.iterdir():
+        if workspace.is_dir() and (workspace / LOCK_NAME).exists() and not _is_locked(workspace):
+            workspaces.append((workspace, *_usage(workspace)))
+    workspaces.sort(key=lambda entry: entry[1])
+
+    cutoff = time.time() - max_age_hours * 3600
+    total = sum(size for _, _, size in workspaces)
+    limit = max_mb * 1024 * 1024
+    removed = []
+    for workspace, last_modified, size in workspaces:
+        if last_modified >= cutoff and total <= limit:
+            continue
+        logger.info("Removing workspace %s (%.1f MB)", workspace, size / 1024 / 1024)
+        if not dry_run:
+            shutil.rmtree(workspace, ignore_errors=True)
+        total -= size
+        removed.append(workspace)
+    return removed
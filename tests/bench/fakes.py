@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import io
+import json
+import re
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+# Narration pace used to size fake scripts and fake TTS audio
+CHARS_PER_SECOND = 15
+SCENE_SECONDS = 30
+
+
+def silent_mp3_second(workdir: Path) -> bytes:
+    path = workdir / "silence_1s.mp3"
+    if not path.exists():
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono", "-t", "1",
+                "-b:a", "32k", "-write_xing", "0", "-id3v2_version", "0",
+                str(path),
+            ],
+            check=True,
+        )
+    return path.read_bytes()
+
+
+def fake_script(minutes: float) -> str:
+    scenes = max(1, int(minutes * 60 // SCENE_SECONDS))
+    sentence = "ఇది పరీక్ష వాక్యం. "
+    narration = (sentence * (SCENE_SECONDS * CHARS_PER_SECOND // len(sentence) + 1))[: SCENE_SECONDS * CHARS_PER_SECOND]
+    return "\n\n".join(
+        f"Scene {index}: Part {index}\nNarration: {narration.strip()}\nVisual: test scene {index % 5}\n"
+        f"Duration: {SCENE_SECONDS}"
+        for index in range(1, scenes + 1)
+    )
+
+
+class FakeGTTS:
+    second: bytes = b""
+    latency_s: float = 0.0
+
+    def __init__(self, text: str, lang: str = "te", tld: str = "co.in", **_: Any) -> None:
+        self.text = text
+
+    def write_to_fp(self, fp: io.BufferedIOBase) -> None:
+        time.sleep(self.latency_s)
+        fp.write(self.second * max(1, round(len(self.text) / CHARS_PER_SECOND)))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as handle:
+            self.write_to_fp(handle)
+
+
+def install_fake_gtts(workdir: Path, latency_s: float) -> None:
+    import gtts
+
+    FakeGTTS.second = silent_mp3_second(workdir)
+    FakeGTTS.latency_s = latency_s
+    gtts.gTTS = FakeGTTS
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    latency_s = 0.0
+    image_bytes = b""
+
+    def log_message(self, *_: Any) -> None:
+        pass
+
+    def _send(self, payload: Any, content_type: str = "application/json") -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, content: str, model: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for start in range(0, len(content), 40):
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + 40]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_GET(self) -> None:
+        self._send(self.image_bytes, "image/png")
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.latency_s)
+        if self.path.endswith("/images/generations"):
+            host, port = self.server.server_address[:2]
+            self._send({"created": int(time.time()), "data": [{"url": f"http://{host}:{port}/image.png"}]})
+            return
+        prompt = request["messages"][-1]["content"]
+        if "SEO" in prompt:
+            content = json.dumps({"title": "Bench", "description": "Bench video", "tags": "bench,telugu"})
+        else:
+            match = re.search(r"Full duration: (\d+(?:\.\d+)?) minutes", prompt)
+            content = fake_script(float(match.group(1)) if match else 1)
+        if request.get("stream"):
+            self._send_stream(content, request.get("model", "bench"))
+            return
+        self._send(
+            {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "bench"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        )
+
+
+def start_fake_openai(latency_s: float) -> tuple[ThreadingHTTPServer, str]:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1024, 1024), color=(40, 60, 90)).save(buffer, format="PNG")
+    _OpenAIHandler.image_bytes = buffer.getvalue()
+    _OpenAIHandler.latency_s = latency_s
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+class FakeYouTubeRequest:
+    def __init__(self, response: dict[str, Any], latency_s: float) -> None:
+        self._response = response
+        self._latency_s = latency_s
+        self.resumable_uri: Optional[str] = None
+
+    def execute(self) -> dict[str, Any]:
+        time.sleep(self._latency_s)
+        return self._response
+
+    def next_chunk(self, **_: Any) -> tuple[Optional[Any], Optional[dict[str, Any]]]:
+        self.resumable_uri = "http://127.0.0.1/upload/session"
+        return None, self.execute()
+
+
+class FakeYouTubeService:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def videos(self) -> "FakeYouTubeService":
+        return self
+
+    def thumbnails(self) -> "FakeYouTubeService":
+        return self
+
+    def insert(self, **_: Any) -> FakeYouTubeRequest:
+        return FakeYouTubeRequest({"id": "bench-video"}, self.latency_s)
+
+    def set(self, **_: Any) -> FakeYouTubeRequest:
+        return FakeYouTubeRequest({}, self.latency_s)
@@ -0,0 +1,180 @@
+"""Offline pipeline benchmarks against local stand-ins for OpenAI, gTTS and YouTube.
+
+    python tests/bench/run_bench.py --durations 1 3 15 --save bench.json
+    python tests/bench/run_bench.py --durations 1 --baseline bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import (  # noqa: E402
+    FakeGTTS,
+    FakeYouTubeService,
+    fake_script,
+    install_fake_gtts,
+    start_fake_openai,
+)
+
+
+def _timeit(func: Callable[[], Any], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _result(name: str, minutes: float, samples: list[float], units: int, **extra: Any) -> dict[str, Any]:
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "minutes": minutes,
+        "runs": len(samples),
+        "median_s": round(median, 4),
+        "min_s": round(min(samples), 4),
+        "units": units,
+        "units_per_s": round(units / median, 2) if median else None,
+        **extra,
+    }
+
+
+def run_suite(durations: list[float], repeat: int, workdir: Path) -> list[dict[str, Any]]:
+    from app import upload
+    from app.agent import AgentConfig, run_pipeline
+    from app.scenes import build_timestamps, parse_scenes
+    from app.subtitles import build_cues, to_ass
+    from app.thumbnail import create_thumbnail
+    from app.video import create_video
+
+    upload.get_youtube_service = lambda *_: FakeYouTubeService(latency_s=0.05)
+    results = []
+    for minutes in durations:
+        label = f"{minutes:g}min"
+        script = fake_script(minutes)
+        scenes = parse_scenes(script, default_duration_s=8)
+
+        samples = _timeit(lambda: parse_scenes(script, default_duration_s=8), max(repeat, 20))
+        results.append(_result("parse_scenes", minutes, samples, units=len(scenes)))
+
+        samples = _timeit(lambda: to_ass(build_cues(build_timestamps(scenes)), (1280, 720)), max(repeat, 20))
+        results.append(_result("build_subtitles", minutes, samples, units=len(scenes)))
+
+        thumbnail = workdir / f"thumbnail_{label}.png"
+        samples = _timeit(lambda: create_thumbnail(f"Bench {label}", thumbnail), max(repeat, 5))
+        results.append(_result("create_thumbnail", minutes, samples, units=1))
+
+        audio = workdir / f"audio_{label}.mp3"
+        audio.write_bytes(FakeGTTS.second * int(minutes * 60))
+        video = workdir / f"video_{label}.mp4"
+        samples = _timeit(lambda: create_video(audio, thumbnail, video), repeat)
+        results.append(_result("create_video", minutes, samples, units=int(minutes * 60)))
+
+        for mode in ("still", "scenes"):
+            runs = iter(range(repeat))
+            last: dict[str, Path] = {}
+
+            def pipeline() -> None:
+                config = AgentConfig(
+                    workdir=workdir / f"pipeline_{mode}_{label}_{next(runs)}",
+                    voice="co.in",
+                    language="te",
+                    style="Simple Telugu",
+                    short_duration=1,
+                    full_duration=int(minutes),
+                    video_type="full",
+                    render_mode=mode,
+                )
+                last.update(run_pipeline(f"Bench {label}", config))
+
+            samples = _timeit(pipeline, repeat)
+            timings = json.loads((last["video"].parent / "timings.json").read_text(encoding="utf-8"))
+            stages = {name: record["wall_seconds"] for name, record in timings["stages"].items()}
+            results.append(
+                _result(f"run_pipeline_{mode}", minutes, samples, units=int(minutes * 60), stages=stages)
+            )
+
+            samples = _timeit(
+                lambda: upload.upload_video(
+                    video_path=last["video"],
+                    metadata_path=last["metadata"],
+                    thumbnail_path=last["thumbnail"],
+                    client_secret_path=workdir / "client_secret.json",
+                    token_path=workdir / "token.json",
+                ),
+                repeat,
+            )
+            results.append(_result(f"upload_video_{mode}", minutes, samples, units=1))
+
+        for result in results[-8:]:
+            print(f"{result['name']:<24} {label:>6} median {result['median_s']:>9.4f}s")
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float) -> list[str]:
+    previous = {(entry["name"], entry["minutes"]): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["name"], entry["minutes"]))
+        if old and entry["median_s"] > old["median_s"] * (1 + tolerance):
+            regressions.append(
+                f"{entry['name']} ({entry['minutes']:g}min): {old['median_s']:.4f}s -> {entry['median_s']:.4f}s"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 3, 15], help="Video lengths in minutes")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated network latency per call (s)")
+    parser.add_argument("--cache", action="store_true", help="Keep the artifact cache enabled")
+    parser.add_argument("--save", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline")
+    args = parser.parse_args()
+    save_path = args.save.resolve() if args.save else None
+    baseline_path = args.baseline.resolve() if args.baseline else None
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = Path(tmp)
+        server, base_url = start_fake_openai(args.latency)
+        os.environ.update(
+            OPENAI_API_KEY="bench",
+            OPENAI_BASE_URL=base_url,
+            CACHE_ENABLED="1" if args.cache else "0",
+            CACHE_DIR=str(workdir / "cache"),
+        )
+        install_fake_gtts(workdir, args.latency)
+        os.chdir(workdir)
+        try:
+            results = run_suite(args.durations, args.repeat, workdir)
+        finally:
+            server.shutdown()
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], "results": results}
+    if save_path:
+        save_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved results to {save_path}")
+    if baseline_path:
+        regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8"))["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from app.audio import AudioMix, SfxCue, find_sfx, mix_graph, sfx_cues
+from app.scenes import Scene
+
+
+def test_find_sfx_matches_library_names_in_description(tmp_path: Path) -> None:
+    for name in ("rain.wav", "heavy_rain.mp3", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+
+    assert find_sfx("Heavy rain on the roof", tmp_path) == tmp_path / "heavy_rain.mp3"
+    assert find_sfx("soft rain", tmp_path) == tmp_path / "rain.wav"
+    assert find_sfx("birds", tmp_path) is None
+
+
+def test_sfx_cues_follow_scene_timestamps(monkeypatch: object, tmp_path: Path) -> None:
+    (tmp_path / "bell.wav").write_bytes(b"")
+    monkeypatch.setenv("SFX_DIR", str(tmp_path))
+    scenes = [Scene(index, f"S{index}", "", "", 4.0, "", sfx) for index, sfx in enumerate(["", "temple bell"])]
+
+    assert sfx_cues([(scenes[0], 0.0, 4.0), (scenes[1], 4.0, 8.0)], offset=3.0) == (
+        SfxCue(tmp_path / "bell.wav", 7.0),
+    )
+
+
+def test_mix_graph_ducks_music_places_effects_and_normalizes() -> None:
+    mix = AudioMix(Path("bgm.mp3"), (SfxCue(Path("bell.wav"), 7.25),), loudness=-14.0)
+    inputs, graph = mix_graph(mix, "0:a", first_input=1)
+
+    assert inputs == ["-stream_loop", "-1", "-i", "bgm.mp3", "-i", "bell.wav"]
+    assert "[bgm][key]sidechaincompress" in graph
+    assert "[2:a]" in graph and "adelay=7250:all=1" in graph
+    assert "amix=inputs=3:duration=first" in graph
+    assert graph.endswith("loudnorm=I=-14.0:TP=-1.5:LRA=11,aresample=44100[mixed]")
+
+    inputs, graph = mix_graph(AudioMix(loudness=None), "0:a", first_input=1)
+    assert inputs == [] and graph.endswith("[voice];[voice]anull[mixed]")
+
+
+def test_default_mix_normalizes_narration_only_when_asked(monkeypatch: object, tmp_path: Path) -> None:
+    from app.audio import default_mix
+
+    bgm = tmp_path / "bgm.mp3"
+    bgm.write_bytes(b"")
+    monkeypatch.delenv("BGM_PATH", raising=False)
+    monkeypatch.delenv("AUDIO_LOUDNESS_LUFS", raising=False)
+
+    assert not default_mix().active
+    assert default_mix((SfxCue(bgm, 1.0),)).loudness == -14.0
+
+    monkeypatch.setenv("BGM_PATH", str(bgm))
+    assert default_mix().loudness == -14.0
+
+    monkeypatch.delenv("BGM_PATH")
+    monkeypatch.setenv("AUDIO_LOUDNESS_LUFS", "-16")
+    assert default_mix().active and default_mix().loudness == -16.0
+    monkeypatch.setenv("AUDIO_LOUDNESS_LUFS", "off")
+    assert not default_mix().active
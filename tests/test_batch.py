@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import pytest
+
+from app.batch import load_topics
+
+
+def test_load_topics_from_csv_and_jsonl(tmp_path: Path) -> None:
+    csv_path = tmp_path / "topics.csv"
+    csv_path.write_text("topic,style,full_duration\nAI,Story,10\nHealth,,\n", encoding="utf-8")
+    jsonl_path = tmp_path / "topics.jsonl"
+    jsonl_path.write_text('{"topic": "Finance", "video_type": "short"}\n\n', encoding="utf-8")
+
+    csv_items = load_topics(csv_path)
+    jsonl_items = load_topics(jsonl_path)
+
+    assert [(item.topic, item.style, item.full_duration) for item in csv_items] == [
+        ("AI", "Story", 10),
+        ("Health", "Simple Telugu", 15),
+    ]
+    assert jsonl_items[0].video_type == "short"
+
+
+def test_load_topics_requires_topic(tmp_path: Path) -> None:
+    path = tmp_path / "topics.jsonl"
+    path.write_text('{"style": "Story"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_topics(path)
@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.cache import ArtifactCache, make_key
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path: Path) -> None:
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=10)
+    first, second, third = make_key("a"), make_key("b"), make_key("c")
+
+    cache.put_bytes(first, b"11111", ".txt")
+    cache.put_bytes(second, b"22222", ".txt")
+    os.utime(cache.get(second, ".txt"), (0, 0))
+    assert cache.get_bytes(first, ".txt") == b"11111"
+
+    cache.put_bytes(third, b"33333", ".txt")
+
+    assert cache.get(second, ".txt") is None
+    assert cache.get_bytes(third, ".txt") == b"33333"
+    output = tmp_path / "out" / "first.txt"
+    assert cache.fetch(first, output, ".txt")
+    assert output.read_bytes() == b"11111"
+
+
+def test_make_key_is_unambiguous() -> None:
+    assert make_key("ab", "c") != make_key("a", "bc")
+
+
+def test_overwrite_keeps_size_and_eviction_race_is_a_miss(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=100)
+    key = make_key("a")
+    for _ in range(3):
+        cache.put_bytes(key, b"12345", ".txt")
+    assert cache._size == 5
+
+    evicted = cache.get(key, ".txt")
+    monkeypatch.setattr(cache, "get", lambda key, suffix="": evicted)
+    evicted.unlink()
+
+    assert cache.get_bytes(key, ".txt") is None
+    assert not cache.fetch(key, tmp_path / "out.txt", ".txt")
@@ -0,0 +1,40 @@
+from importlib.util import find_spec
+from pathlib import Path
+
+import pytest
+
+from app.clients import get_openai_client
+
+
+def test_openai_client_is_reused_per_key() -> None:
+    if not find_spec("openai"):
+        pytest.skip("openai not installed")
+
+    assert get_openai_client("key-a") is get_openai_client("key-a")
+    assert get_openai_client("key-a") is not get_openai_client("key-b")
+
+
+def test_youtube_credential_load_does_not_hold_client_lock(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    import threading
+    from types import SimpleNamespace
+
+    import app.clients as clients
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_load(client_secret_path: object, token_path: object) -> SimpleNamespace:
+        started.set()
+        release.wait(5)
+        return SimpleNamespace(valid=True)
+
+    monkeypatch.setattr(clients, "load_credentials", slow_load)
+    worker = threading.Thread(target=clients.get_youtube_credentials, args=(tmp_path / "a", tmp_path / "b"))
+    worker.start()
+    started.wait(5)
+    try:
+        assert clients._lock.acquire(timeout=1)
+        clients._lock.release()
+    finally:
+        release.set()
+        worker.join()
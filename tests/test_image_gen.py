@@ -0,0 +1,36 @@
+import asyncio
+import base64
+from pathlib import Path
+from types import SimpleNamespace
+
+import app.image_gen as image_gen
+from app.cache import ArtifactCache
+
+
+def test_agenerate_images_dedupes_caches_and_falls_back(monkeypatch: object, tmp_path: Path) -> None:
+    requests: list[str] = []
+
+    class FakeImages:
+        async def generate(self, model: str, prompt: str, size: str) -> SimpleNamespace:
+            requests.append(prompt)
+            if prompt == "broken":
+                raise RuntimeError("upstream error")
+            return SimpleNamespace(data=[SimpleNamespace(b64_json=base64.b64encode(prompt.encode()).decode())])
+
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=1 << 20)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(image_gen, "get_cache", lambda: cache)
+    monkeypatch.setattr(image_gen, "get_async_openai_client", lambda api_key: SimpleNamespace(images=FakeImages()))
+    prompts = {
+        tmp_path / "a.png": "Cinematic Telugu scene",
+        tmp_path / "b.png": "  cinematic telugu   SCENE ",
+        tmp_path / "c.png": "broken",
+    }
+
+    placeholders = asyncio.run(image_gen.agenerate_images(prompts))
+    again = asyncio.run(image_gen.agenerate_images({tmp_path / "d.png": "cinematic telugu scene"}))
+
+    assert sorted(requests) == ["Cinematic Telugu scene", "broken"]
+    assert placeholders == {tmp_path / "c.png"} and again == set()
+    assert (tmp_path / "b.png").read_bytes() == (tmp_path / "d.png").read_bytes() == b"Cinematic Telugu scene"
+    assert (tmp_path / "c.png").read_bytes()[:4] == b"\x89PNG"
@@ -0,0 +1,73 @@
+import time
+from pathlib import Path
+
+from app.jobs import JobQueue
+
+
+def _wait_for(queue: JobQueue, job_id: str) -> dict:
+    for _ in range(100):
+        job = queue.get(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_queue_completes_and_fails() -> None:
+    queue = JobQueue(max_workers=2)
+
+    def ok(name: str, progress) -> dict[str, Path]:
+        progress({"type": "stage_started", "stage": "video"})
+        return {"video": Path(name)}
+
+    def boom(progress) -> dict[str, Path]:
+        raise RuntimeError("boom")
+
+    done = _wait_for(queue, queue.submit("ok", ok, "video.mp4").id)
+    failed = _wait_for(queue, queue.submit("bad", boom).id)
+    queue.shutdown()
+
+    assert done["artifacts"] == {"video": "video.mp4"}
+    assert [event["type"] for event in queue.events(done["id"])] == [
+        "job_queued",
+        "job_started",
+        "stage_started",
+        "job_completed",
+    ]
+    assert queue.events(done["id"], start=3)[0]["seq"] == 3
+    assert failed["status"] == "failed"
+    assert failed["error"] == "boom"
+    assert queue.get("missing") is None
+
+
+def test_job_queue_drops_old_finished_jobs_with_their_events() -> None:
+    queue = JobQueue(max_workers=1, retention_seconds=3600, max_finished=2)
+
+    def ok(progress) -> dict[str, Path]:
+        return {}
+
+    ids = [_wait_for(queue, queue.submit(str(index), ok).id)["id"] for index in range(3)]
+    queue.shutdown()
+
+    assert queue.get(ids[0]) is None and queue.events(ids[0]) == []
+    assert queue.get(ids[1]) is not None and queue.get(ids[2]) is not None
+    assert ids[0] not in queue._events
+
+    expiring = JobQueue(max_workers=1, retention_seconds=0.05, max_finished=10)
+    job_id = _wait_for(expiring, expiring.submit("old", ok).id)["id"]
+    time.sleep(0.1)
+    expiring.submit("new", ok)
+    expiring.shutdown()
+    assert expiring.get(job_id) is None
+
+
+def test_map_encode_reports_weighted_progress_in_call_order(monkeypatch: object) -> None:
+    from app.jobs import map_encode
+
+    monkeypatch.setenv("ENCODE_WORKERS", "0")
+    progress: list[float] = []
+
+    results = map_encode(lambda value: value * 2, [(1,), (2,), (3,)], progress=progress.append, weights=[2, 1, 1])
+
+    assert results == [2, 4, 6]
+    assert progress == [0.5, 0.75, 1.0]
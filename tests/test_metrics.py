@@ -0,0 +1,68 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.metrics import MetricsRegistry, instrument, registry
+from app.retry_utils import with_retry
+
+
+def test_instrument_records_retries_bytes_and_errors(tmp_path: Path) -> None:
+    calls = {"count": 0}
+
+    @with_retry(attempts=2, wait_seconds=0)
+    def flaky() -> None:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("transient")
+
+    output = tmp_path / "out.bin"
+    output.write_bytes(b"12345")
+    with instrument("unit") as record:
+        flaky()
+        record.add_output(output)
+
+    assert record.retries == 1
+    assert record.bytes_written == 5
+    assert record.wall_seconds >= 0
+
+    with pytest.raises(ValueError):
+        with instrument("unit") as failed:
+            raise ValueError("bad")
+    assert failed.error == "ValueError"
+
+    text = registry.render_prometheus()
+    assert 'pipeline_stage_duration_seconds_count{stage="unit"}' in text
+    assert 'pipeline_stage_errors_total{stage="unit"} 1' in text
+
+
+def test_empty_registry_renders_process_gauge() -> None:
+    assert "process_peak_rss_bytes" in MetricsRegistry().render_prometheus()
+
+
+def test_encode_worker_usage_is_charged_to_the_submitting_stage() -> None:
+    from concurrent.futures import Future
+
+    from app.jobs import _collect, _measured
+
+    result, cpu_seconds, _ = _measured(sum, ([1, 2],), {})
+    future: Future = Future()
+    future.set_result(("segment.mp4", 2.5, 120.0))
+    with instrument("encode_unit") as record:
+        assert _collect(future) == "segment.mp4"
+
+    assert result == 3 and cpu_seconds >= 0
+    assert record.cpu_seconds >= 2.5
+    assert record.peak_child_rss_mb == 120.0
+
+
+def test_ffmpeg_child_usage_is_recorded(tmp_path: Path) -> None:
+    if not shutil.which("ffmpeg"):
+        pytest.skip("ffmpeg not installed")
+    from app.utils import run_ffmpeg
+
+    with instrument("ffmpeg_unit") as record:
+        run_ffmpeg(["-f", "lavfi", "-i", "sine=d=2", str(tmp_path / "tone.wav")])
+
+    assert record.cpu_seconds > 0
+    assert record.peak_child_rss_mb > 0
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from app.pipeline import Stage, run_stages
+
+
+def test_run_stages_passes_dependency_outputs_and_overlaps_independent_stages() -> None:
+    barrier = threading.Barrier(2, timeout=2)
+
+    def left(_: dict) -> str:
+        barrier.wait()
+        return "L"
+
+    def right(_: dict) -> str:
+        barrier.wait()
+        return "R"
+
+    result = run_stages(
+        [
+            Stage("join", lambda inputs: inputs["left"] + inputs["right"], deps=("left", "right")),
+            Stage("left", left),
+            Stage("right", right),
+        ]
+    )
+
+    assert result.outputs["join"] == "LR"
+    assert set(result.timings) == {"left", "right", "join"}
+
+
+def test_run_stages_rejects_cycles_and_unknown_deps() -> None:
+    with pytest.raises(ValueError):
+        run_stages([Stage("a", lambda _: 1, deps=("b",)), Stage("b", lambda _: 1, deps=("a",))])
+    with pytest.raises(ValueError):
+        run_stages([Stage("a", lambda _: 1, deps=("missing",))])
+
+
+def test_run_stages_resumes_from_checkpoint(tmp_path) -> None:
+    from app.pipeline import Checkpoint
+
+    calls: list[str] = []
+
+    def make(name: str, fail: bool = False):
+        def run(_: dict):
+            calls.append(name)
+            if fail:
+                raise RuntimeError(name)
+            path = tmp_path / f"{name}.txt"
+            path.write_text(name, encoding="utf-8")
+            return path
+
+        return run
+
+    checkpoint_path = tmp_path / "checkpoint.json"
+    with pytest.raises(RuntimeError):
+        run_stages(
+            [Stage("script", make("script")), Stage("metadata", make("metadata", fail=True), deps=("script",))],
+            checkpoint=Checkpoint(checkpoint_path, "v1"),
+        )
+
+    assert Checkpoint(checkpoint_path, "v1").restore("script") == tmp_path / "script.txt"
+    assert Checkpoint(checkpoint_path, "v2").restore("script") is None
+
+    result = run_stages(
+        [Stage("script", make("script")), Stage("metadata", make("metadata"), deps=("script",))],
+        checkpoint=Checkpoint(checkpoint_path, "v1"),
+    )
+
+    assert calls == ["script", "metadata", "metadata"]
+    assert result.resumed == ["script"]
+    assert not checkpoint_path.exists()
+
+
+def test_checkpoint_reruns_changed_outputs_and_their_dependents(tmp_path) -> None:
+    from app.pipeline import Checkpoint
+
+    calls: list[str] = []
+
+    def make(name: str, fail: bool = False):
+        def run(_: dict):
+            calls.append(name)
+            if fail:
+                raise RuntimeError(name)
+            path = tmp_path / f"{name}.txt"
+            path.write_text(name, encoding="utf-8")
+            return path
+
+        return run
+
+    checkpoint_path = tmp_path / "checkpoint.json"
+    with pytest.raises(RuntimeError):
+        run_stages(
+            [
+                Stage("script", make("script")),
+                Stage("audio", make("audio"), deps=("script",)),
+                Stage("video", make("video", fail=True), deps=("audio",)),
+            ],
+            checkpoint=Checkpoint(checkpoint_path, "v1"),
+        )
+    (tmp_path / "script.txt").write_text("edited by hand", encoding="utf-8")
+    calls.clear()
+
+    result = run_stages(
+        [
+            Stage("script", make("script")),
+            Stage("audio", make("audio"), deps=("script",)),
+            Stage("video", make("video"), deps=("audio",)),
+        ],
+        checkpoint=Checkpoint(checkpoint_path, "v1"),
+    )
+
+    assert result.resumed == []
+    assert calls == ["script", "audio", "video"]
+
+
+def test_run_stages_emits_progress_events() -> None:
+    events: list[dict] = []
+
+    run_stages([Stage("a", lambda _: 1), Stage("b", lambda _: 2, deps=("a",))], progress=events.append)
+
+    assert [(event["type"], event["stage"]) for event in events] == [
+        ("stage_started", "a"),
+        ("stage_finished", "a"),
+        ("stage_started", "b"),
+        ("stage_finished", "b"),
+    ]
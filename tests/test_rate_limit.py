@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import retry_utils
+from app.rate_limit import UpstreamLimiter
+from app.retry_utils import is_retryable, with_retry
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+def test_limiter_spaces_requests_and_tokens() -> None:
+    now = {"t": 0.0}
+    slept: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now["t"] += seconds
+
+    limiter = UpstreamLimiter(60, tokens_per_minute=600, clock=lambda: now["t"], sleep=sleep)
+    for _ in range(60):
+        limiter.acquire()
+    assert slept == []
+
+    limiter.acquire()
+    assert slept == [pytest.approx(1.0)]
+
+    # Oversized token requests are capped at the bucket size instead of blocking forever
+    limiter.acquire(tokens=620)
+    assert sum(slept) == pytest.approx(2.0)
+    limiter.acquire(tokens=50)
+    assert sum(slept) == pytest.approx(6.0)
+
+    limiter.pause(5)
+    assert limiter.reserve() == pytest.approx(5)
+
+
+def test_retry_skips_permanent_errors_and_honours_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    slept: list[float] = []
+    monkeypatch.setattr(retry_utils.time, "sleep", slept.append)
+    calls = {"count": 0}
+
+    @with_retry(attempts=3, wait_seconds=0.1)
+    def rate_limited() -> str:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise HttpStatusError(429, {"retry-after": "7"})
+        return "ok"
+
+    assert rate_limited() == "ok"
+    assert slept == [7.0]
+
+    @with_retry(attempts=3, wait_seconds=0.1)
+    def unauthorized() -> None:
+        calls["count"] += 1
+        raise HttpStatusError(401)
+
+    calls["count"] = 0
+    with pytest.raises(HttpStatusError):
+        unauthorized()
+    assert calls["count"] == 1
+
+    wrapped = RuntimeError("tts failed")
+    wrapped.__cause__ = HttpStatusError(503)
+    assert is_retryable(wrapped)
+    assert not is_retryable(FileNotFoundError("video.mp4"))
+    assert is_retryable(ConnectionError("reset"))
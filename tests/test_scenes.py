@@ -0,0 +1,108 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app import scene_render
+from app.scene_render import load_scenes, narration_text, rerender_scene_video
+from app.scenes import parse_scenes
+from app.utils import load_json, mp3_duration
+
+
+def test_parse_scenes_accepts_duration_with_units() -> None:
+    scenes = parse_scenes("Scene 1: Intro\nNarration: నమస్తే\nDuration: 5 seconds", default_duration_s=8)
+
+    assert scenes[0].duration_s == 5.0
+    assert scenes[0].narration == "నమస్తే"
+
+
+def test_load_scenes_falls_back_to_paragraphs() -> None:
+    scenes = load_scenes("మొదటి భాగం.\n\nరెండవ భాగం.", title="Topic")
+
+    assert [scene.narration for scene in scenes] == ["మొదటి భాగం.", "రెండవ భాగం."]
+    assert narration_text(scenes) == "మొదటి భాగం.\n\nరెండవ భాగం."
+
+
+def test_rerender_encodes_only_edited_scenes(monkeypatch: object, tmp_path: Path) -> None:
+    frame = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+    encoded: list[list[str]] = []
+
+    async def fake_images(prompts: dict[Path, str]) -> set[Path]:
+        for path, prompt in prompts.items():
+            path.write_text(prompt)
+        return set()
+
+    def fake_voice(text: str, output_path: Path, language: str, voice: str, store: object = None) -> list:
+        output_path.write_bytes(frame * 10)
+        return []
+
+    def fake_encode(func: object, calls: list[tuple], **_: object) -> list:
+        if func is scene_render.prepare_frame:
+            for image, _profile, frame_path in calls:
+                frame_path.write_bytes(image.read_bytes())
+            return []
+        encoded.append([outputs[0].frame_path.read_text() for audio, _, outputs in calls if audio])
+        for *_, outputs in calls:
+            for output in outputs:
+                output.output_path.write_bytes(b"segment")
+        return []
+
+    monkeypatch.setenv("SUBTITLE_MODE", "soft")
+    monkeypatch.setattr(scene_render, "generate_scene_images", fake_images)
+    monkeypatch.setattr(scene_render, "synthesize_voice", fake_voice)
+    monkeypatch.setattr(scene_render, "map_encode", fake_encode)
+    monkeypatch.setattr(scene_render, "concat_segments", lambda segments, output_path, **_: output_path)
+    script = "\n\n".join(f"Scene {i}: T{i}\nNarration: line {i}.\nVisual: prompt {i}" for i in range(1, 4))
+    (tmp_path / "script.txt").write_text(script, encoding="utf-8")
+
+    scene_render.render_scene_video(script, "Topic", tmp_path, tmp_path / "video.mp4", "te", "co.in")
+    (tmp_path / "script.txt").write_text(script.replace("Visual: prompt 2", "Visual: new prompt"), encoding="utf-8")
+    monkeypatch.setenv("SUBTITLE_MODE", "burn")
+    rerender_scene_video(tmp_path)
+
+    assert sorted(encoded[0]) == ["prompt 1", "prompt 2", "prompt 3"]
+    assert encoded[1] == ["new prompt"]
+    assert (tmp_path / "narration.mp3").read_bytes() == frame * 30
+    assert not list((tmp_path / "scenes").glob("*.ass"))
+    timings = load_json(tmp_path / "narration_timings.json")["chunks"]
+    assert [chunk["text"] for chunk in timings] == ["line 1.", "line 2.", "line 3."]
+    assert timings[0]["seconds"] == round(mp3_duration(frame * 10), 3)
+    assert not (tmp_path / "scenes" / f"image_{scene_render.image_key('prompt 2')[:16]}.png").exists()
+
+
+def test_short_is_trimmed_when_first_scene_exceeds_limit(monkeypatch: object, tmp_path: Path) -> None:
+    if not shutil.which("ffmpeg"):
+        pytest.skip("ffmpeg not installed")
+    from PIL import Image
+
+    from app.encoding import Rendition, get_profile
+    from app.utils import probe_duration, run_ffmpeg
+
+    async def fake_images(prompts: dict[Path, str]) -> set[Path]:
+        for path in prompts:
+            Image.new("RGB", (64, 64), (40, 80, 120)).save(path)
+        return set()
+
+    def fake_voice(text: str, output_path: Path, language: str, voice: str, store: object = None) -> list:
+        run_ffmpeg(["-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono", "-t", "8", str(output_path)])
+        return []
+
+    monkeypatch.setenv("SUBTITLE_MODE", "soft")
+    monkeypatch.setenv("ENCODE_WORKERS", "0")
+    monkeypatch.setenv("CACHE_ENABLED", "0")
+    monkeypatch.setenv("INTRO_SECONDS", "1")
+    monkeypatch.setattr(scene_render, "generate_scene_images", fake_images)
+    monkeypatch.setattr(scene_render, "synthesize_voice", fake_voice)
+    short = Rendition(get_profile("draft"), tmp_path / "short.mp4", max_seconds=5)
+    progress: list[float] = []
+
+    scene_render.render_scene_video(
+        "Scene 1: T\nNarration: one.\nVisual: a", "Topic", tmp_path, tmp_path / "video.mp4", "te", "co.in",
+        profile=get_profile("draft"), short=short, progress=progress.append,
+    )
+
+    assert probe_duration(tmp_path / "video.mp4") > 9
+    assert probe_duration(tmp_path / "short.mp4") <= 5.1
+    assert "00:00:05,000" in (tmp_path / "short_subtitles.srt").read_text(encoding="utf-8")
+    assert not list(tmp_path.rglob("*.txt"))
+    assert progress == sorted(progress) and progress[-1] == 1.0
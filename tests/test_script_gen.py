@@ -12,3 +12,65 @@ def test_generate_script_fallback(monkeypatch: object) -> None:
         full_duration=15,
     )
     assert "OPENAI_API_KEY" in script
+
+
+def test_stream_script_yields_sections_as_they_complete(monkeypatch: object) -> None:
+    from types import SimpleNamespace
+
+    import app.script_gen as script_gen
+
+    deltas = ["పరిచయం", " భాగం.\n", "\nముఖ్య", " విషయం.\n\n", "ముగింపు."]
+
+    class _Completions:
+        def create(self, **kwargs):
+            assert kwargs["stream"] is True
+            for delta in deltas:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_Completions()))
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("CACHE_ENABLED", "0")
+    monkeypatch.setattr(script_gen, "get_openai_client", lambda api_key: client)
+
+    sections = script_gen.stream_script(
+        topic="Test",
+        style="Simple Telugu",
+        language="te",
+        video_type="Auto",
+        short_duration=3,
+        full_duration=15,
+    )
+
+    assert next(sections) == "పరిచయం భాగం."
+    assert list(sections) == ["ముఖ్య విషయం.", "ముగింపు."]
+
+
+def test_agenerate_script_uses_async_client(monkeypatch: object) -> None:
+    import asyncio
+    from types import SimpleNamespace
+
+    import app.script_gen as script_gen
+
+    class _Completions:
+        async def create(self, **kwargs):
+            message = SimpleNamespace(content=f"  {kwargs['model']} script  ")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_Completions()))
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_MODEL", "model-x")
+    monkeypatch.setenv("CACHE_ENABLED", "0")
+    monkeypatch.setattr(script_gen, "get_async_openai_client", lambda api_key: client)
+
+    script = asyncio.run(
+        script_gen.agenerate_script(
+            topic="Test",
+            style="Simple Telugu",
+            language="te",
+            video_type="Auto",
+            short_duration=3,
+            full_duration=15,
+        )
+    )
+
+    assert script == "model-x script"
@@ -0,0 +1,65 @@
+import json
+
+from app.script_gen import generate_script_package
+from app.seo import parse_metadata, short_metadata
+
+
+def test_parse_metadata_normalizes_tags_and_falls_back_on_bad_json() -> None:
+    raw = '```json\n{"title": "AI", "description": "వివరణ", "tags": ["#ai", " telugu "]}\n```'
+
+    assert json.loads(parse_metadata(raw, "AI")) == {"title": "AI", "description": "వివరణ", "tags": "ai,telugu"}
+    assert json.loads(parse_metadata("not json", "AI"))["title"] == "AI | తెలుగు వివరణ"
+
+
+def test_short_metadata_tags_title_and_keeps_limit() -> None:
+    metadata = json.dumps({"title": "క" * 100, "description": "d", "tags": "ai,telugu"})
+    short = json.loads(short_metadata(metadata))
+
+    assert short["title"].endswith(" #Shorts") and len(short["title"]) == 100
+    assert short["tags"] == "shorts,ai,telugu"
+
+
+def test_generate_script_package_without_key_uses_two_call_fallback(monkeypatch: object) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+
+    script, metadata = generate_script_package(
+        topic="Test",
+        style="Simple Telugu",
+        language="te",
+        video_type="Auto",
+        short_duration=3,
+        full_duration=15,
+    )
+
+    assert "OPENAI_API_KEY" in script
+    assert json.loads(metadata)["title"] == "Test | తెలుగు వివరణ"
+
+
+def test_sync_and_async_metadata_send_the_same_request(monkeypatch: object) -> None:
+    import asyncio
+    from types import SimpleNamespace
+
+    import app.seo as seo
+
+    requests: list[dict] = []
+    message = SimpleNamespace(content='{"title": "AI", "description": "d", "tags": ["ai"]}')
+    response = SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    class _Completions:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            return response
+
+    class _AsyncCompletions:
+        async def create(self, **kwargs):
+            requests.append(kwargs)
+            return response
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(seo, "get_openai_client", lambda key: SimpleNamespace(chat=SimpleNamespace(completions=_Completions())))
+    monkeypatch.setattr(
+        seo, "get_async_openai_client", lambda key: SimpleNamespace(chat=SimpleNamespace(completions=_AsyncCompletions()))
+    )
+
+    assert seo.generate_metadata("AI", "script") == asyncio.run(seo.agenerate_metadata("AI", "script"))
+    assert requests[0] == requests[1]
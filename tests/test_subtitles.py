@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from app.scenes import Scene, build_timestamps
+from app.subtitles import build_cues, burn_filter, to_ass, to_srt
+
+
+def _scene(narration: str, duration_s: float) -> Scene:
+    return Scene(
+        index=1, title="t", narration=narration, dialogue="", duration_s=duration_s, visual_prompt="", sfx=""
+    )
+
+
+def test_cues_follow_timeline_and_split_long_narration() -> None:
+    long_text = "మొదటి వాక్యం. " + " ".join(["పదం"] * 40)
+    timeline = build_timestamps([_scene("పరిచయం.", 2.0), _scene(long_text, 6.0), _scene("", 1.0)])
+
+    cues = build_cues(timeline, offset=3.0)
+
+    assert cues[0].start == 3.0 and cues[0].end == 5.0
+    assert cues[1].text == "మొదటి వాక్యం."
+    assert all(len(cue.text) <= 84 for cue in cues)
+    assert cues[-1].end == pytest.approx(11.0)
+    assert all(a.end == pytest.approx(b.start) for a, b in zip(cues, cues[1:]))
+
+    srt = to_srt(cues[:1])
+    assert srt == "1\n00:00:03,000 --> 00:00:05,000\nపరిచయం.\n"
+    ass = to_ass(cues[:1], (1280, 720))
+    assert "PlayResY: 720" in ass
+    assert "Dialogue: 0,0:00:03.00,0:00:05.00,Default,,0,0,0,,పరిచయం." in ass
+
+
+def test_burn_filter_escapes_path() -> None:
+    value = burn_filter(Path("/tmp/My: Topic's/scene.ass"))
+
+    assert value.startswith("subtitles=filename=/tmp/My\\\\: Topic\\\\\\'s/scene.ass")
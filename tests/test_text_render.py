@@ -0,0 +1,22 @@
+from app.text_render import get_font, text_width, wrap_text
+
+
+def test_wrap_text_fits_width_and_keeps_words() -> None:
+    text = "తెలుగు వీడియో కోసం ఉపశీర్షికలు ఒక్కో పదాన్ని ఒకసారి మాత్రమే కొలుస్తాయి " * 6
+
+    lines = wrap_text(text, 32, 400)
+
+    assert " ".join(lines) == " ".join(text.split())
+    assert len(lines) > 1
+    font = get_font(32)
+    assert all(font.getlength(line) <= 400 or " " not in line for line in lines)
+    assert wrap_text("", 32, 400) == []
+    assert wrap_text("అతిపొడవైనపదం", 32, 10) == ["అతిపొడవైనపదం"]
+
+
+def test_fonts_and_widths_are_cached() -> None:
+    assert get_font(28) is get_font(28)
+    text_width("పదం", 28)
+    hits = text_width.cache_info().hits
+    text_width("పదం", 28)
+    assert text_width.cache_info().hits == hits + 1
@@ -0,0 +1,74 @@
+from app.tts import split_text
+
+
+def test_split_text_keeps_sentences_and_paragraphs_apart() -> None:
+    text = "మొదటి వాక్యం. రెండవ వాక్యం!\n\nకొత్త పేరా?  ముగింపు."
+
+    assert split_text(text, max_chars=1000) == ["మొదటి వాక్యం. రెండవ వాక్యం!", "కొత్త పేరా? ముగింపు."]
+    assert split_text(text, max_chars=15) == ["మొదటి వాక్యం.", "రెండవ వాక్యం!", "కొత్త పేరా?", "ముగింపు."]
+    assert split_text("   \n\n ") == []
+
+
+def test_asynthesize_chunks_keeps_chunk_order(monkeypatch: object) -> None:
+    import asyncio
+    import time
+
+    import app.tts as tts
+
+    def fake_chunk(text: str, language: str, voice: str) -> bytes:
+        # Later chunks finish first to check results are not returned in completion order
+        time.sleep(0.01 * (3 - len(text) % 3))
+        return text.encode("utf-8")
+
+    monkeypatch.setattr(tts, "_synthesize_chunk", fake_chunk)
+    events: list[dict] = []
+
+    parts = asyncio.run(tts.asynthesize_chunks("ఒకటి.\n\nరెండు.\n\nమూడు.", "te", "co.in", progress=events.append))
+
+    assert b"".join(parts).decode("utf-8") == "ఒకటి.రెండు.మూడు."
+    assert [event["done"] for event in events] == [1, 2, 3]
+
+
+def test_synthesize_chunks_reuses_store_without_cache(monkeypatch: object) -> None:
+    import app.tts as tts
+
+    calls: list[str] = []
+    monkeypatch.setattr(tts, "_synthesize_chunk", lambda text, language, voice: calls.append(text) or text.encode())
+    store = {"ఒకటి.": b"prefetched"}
+
+    parts = tts.synthesize_chunks("ఒకటి.\n\nరెండు.", "te", "co.in", store=store)
+    again = tts.synthesize_chunks("రెండు.", "te", "co.in", store=store)
+
+    assert parts == [b"prefetched", "రెండు.".encode()]
+    assert again == ["రెండు.".encode()]
+    assert calls == ["రెండు."]
+
+
+def test_chunk_retries_in_pool_threads_count_toward_the_stage(monkeypatch: object) -> None:
+    import gtts
+
+    import app.retry_utils as retry_utils
+    import app.tts as tts
+    from app.pipeline import Stage, run_stages
+
+    attempts: list[str] = []
+
+    class _FlakyTTS:
+        def __init__(self, text: str, lang: str, tld: str) -> None:
+            self.text = text
+
+        def write_to_fp(self, handle) -> None:
+            attempts.append(self.text)
+            if len(attempts) == 1:
+                raise ConnectionError("reset by peer")
+            handle.write(self.text.encode("utf-8"))
+
+    monkeypatch.setenv("CACHE_ENABLED", "0")
+    monkeypatch.setattr(gtts, "gTTS", _FlakyTTS)
+    monkeypatch.setattr(tts, "throttle", lambda *args, **kwargs: None)
+    monkeypatch.setattr(retry_utils.time, "sleep", lambda seconds: None)
+
+    result = run_stages([Stage("audio", lambda _: tts.synthesize_chunks("ఒకటి.\n\nరెండు.", "te", "co.in"))])
+
+    assert len(attempts) == 3
+    assert result.records["audio"].retries == 1
@@ -0,0 +1,114 @@
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+from app.upload import QuotaBudget, _resumable_upload, _session_path
+from app.utils import save_json
+
+
+class _Status:
+    def __init__(self, fraction: float) -> None:
+        self.fraction = fraction
+
+    def progress(self) -> float:
+        return self.fraction
+
+
+class _StatusResponse(dict):
+    def __init__(self, status: int, **headers: str) -> None:
+        super().__init__(headers)
+        self.status = status
+
+
+class _FakeHttp:
+    def __init__(self, server: dict[str, Any]) -> None:
+        self.server = server
+
+    def request(self, uri: str, method: str, headers: dict[str, str]) -> tuple[_StatusResponse, bytes]:
+        assert headers["Content-Range"] == "bytes */10"
+        if uri != self.server["uri"]:
+            return _StatusResponse(404), b""
+        return _StatusResponse(308, range=f"bytes=0-{self.server['received'] - 1}"), b""
+
+
+class _FakeUploadRequest:
+    def __init__(self, server: dict[str, Any], fail_after: Optional[int] = None) -> None:
+        self.server = server
+        self.fail_after = fail_after
+        self.http = _FakeHttp(server)
+        self.resumable_uri: Optional[str] = None
+        self.resumable_progress = 0
+        self.sent = 0
+
+    def next_chunk(self, num_retries: int = 0) -> tuple[Optional[_Status], Optional[dict[str, Any]]]:
+        if self.resumable_uri is None:
+            self.resumable_uri = self.server["uri"]
+        if self.fail_after is not None and self.sent >= self.fail_after:
+            raise ConnectionError("connection dropped")
+        # The server must never see a byte twice: each chunk continues where the session left off
+        assert self.resumable_progress == self.server["received"]
+        self.sent += 1
+        self.resumable_progress += 1
+        self.server["received"] += 1
+        if self.server["received"] == self.server["chunks"]:
+            return None, {"id": "video-123"}
+        return _Status(self.server["received"] / self.server["chunks"]), None
+
+
+def test_resumable_upload_persists_session_and_resumes(tmp_path: Path) -> None:
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"0" * 10)
+    server = {"chunks": 4, "received": 0, "uri": "http://127.0.0.1/upload?upload_id=abc"}
+    progress: list[float] = []
+
+    with pytest.raises(ConnectionError):
+        _resumable_upload(lambda: _FakeUploadRequest(server, fail_after=2), video, progress.append)
+    assert _session_path(video).exists()
+
+    resumed: list[_FakeUploadRequest] = []
+
+    def make_request() -> _FakeUploadRequest:
+        resumed.append(_FakeUploadRequest(server))
+        return resumed[-1]
+
+    response = _resumable_upload(make_request, video, progress.append)
+
+    assert response == {"id": "video-123"}
+    assert resumed[0].resumable_uri == "http://127.0.0.1/upload?upload_id=abc"
+    assert resumed[0].sent == 2
+    assert progress[-1] == 1.0
+    assert not _session_path(video).exists()
+
+
+def test_resumable_upload_starts_over_when_session_expired(tmp_path: Path) -> None:
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"0" * 10)
+    server = {"chunks": 2, "received": 0, "uri": "http://127.0.0.1/upload?upload_id=new"}
+    stat = video.stat()
+    save_json(
+        _session_path(video),
+        {"video": {"size": stat.st_size, "mtime": stat.st_mtime}, "resumable_uri": "http://127.0.0.1/expired"},
+    )
+    request = _FakeUploadRequest(server)
+
+    assert _resumable_upload(lambda: request, video, lambda _: None) == {"id": "video-123"}
+    assert request.sent == 2
+
+
+def test_quota_budget_refuses_when_exhausted() -> None:
+    budget = QuotaBudget(2000)
+
+    assert budget.reserve(1650)
+    assert not budget.reserve(1650)
+
+
+def test_quota_budget_ledger_carries_spend_across_runs_within_a_day(tmp_path: Path) -> None:
+    ledger = tmp_path / "youtube_quota.json"
+
+    assert QuotaBudget(2000, ledger=ledger).reserve(1650)
+    assert not QuotaBudget(2000, ledger=ledger).reserve(1650)
+    assert QuotaBudget(2000, ledger=ledger).remaining == 350
+
+    save_json(ledger, {"day": "2000-01-01", "spent": 2000})
+    assert QuotaBudget(2000, ledger=ledger).reserve(1650)
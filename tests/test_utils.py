@@ -3,7 +3,7 @@ from pathlib import Path
 
 import pytest
 
-from app.utils import decrypt_file, encrypt_file
+from app.utils import decrypt_file, encrypt_file, mp3_duration
 
 
 def test_encrypt_decrypt_roundtrip(tmp_path: Path) -> None:
@@ -17,3 +17,12 @@ def test_encrypt_decrypt_roundtrip(tmp_path: Path) -> None:
     decrypted = decrypt_file(sample, key)
 
     assert decrypted.decode("utf-8") == "secret"
+
+
+def test_mp3_duration_counts_frames_after_id3_tag() -> None:
+    # MPEG-2 layer III, 32 kbit/s, 24 kHz mono: 96-byte frames of 576 samples
+    frame = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x06" + bytes(6)
+
+    assert mp3_duration(tag + frame * 50) == pytest.approx(1.2)
+    assert mp3_duration(b"") == 0.0
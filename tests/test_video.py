@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from app.encoding import Rendition, get_profile, prefix_length
+from app.video import _still_image_args
+
+
+def test_still_image_args_copy_mp3_and_reencode_wav() -> None:
+    full = [Rendition(get_profile("full_1080p"), Path("v.mp4"))]
+    mp3_args = _still_image_args(Path("a.mp3"), Path("t.png"), full, fps="2")
+    wav_args = _still_image_args(Path("a.wav"), Path("t.png"), full, fps="2")
+
+    assert mp3_args[:4] == ["-loop", "1", "-framerate", "2"]
+    assert "stillimage" in mp3_args
+    assert mp3_args[mp3_args.index("-c:a") + 1] == "copy"
+    assert wav_args[wav_args.index("-c:a") + 1] == "aac"
+    assert mp3_args[-1] == "v.mp4"
+
+
+def test_renditions_share_one_decode_and_keep_their_own_settings() -> None:
+    renditions = [
+        Rendition(get_profile("full_1080p"), Path("full.mp4")),
+        Rendition(get_profile("short_vertical"), Path("short.mp4"), max_seconds=60),
+    ]
+    args = _still_image_args(Path("a.mp3"), Path("t.png"), renditions, fps="2")
+
+    assert args.count("-i") == 2
+    graph = args[args.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]split=2[s0][s1]")
+    assert "scale=1920:1080" in graph and "boxblur" in graph
+    short_args = args[args.index("full.mp4") + 1:]
+    assert short_args[short_args.index("-t") + 1] == "60.000"
+    assert "-t" not in args[: args.index("full.mp4")]
+    assert get_profile("short_vertical").aspect == "9:16"
+
+
+def test_prefix_length_keeps_whole_items_and_at_least_one() -> None:
+    assert prefix_length([20.0, 30.0, 40.0], 60) == 2
+    assert prefix_length([20.0, 30.0], 60) == 2
+    assert prefix_length([90.0, 10.0], 60) == 1
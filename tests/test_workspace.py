@@ -0,0 +1,68 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.workspace import collect_workspaces, create_workspace, lock_workspace, slugify
+
+
+def test_workspaces_are_content_keyed_and_unique(tmp_path: Path) -> None:
+    first = create_workspace(tmp_path, "తెలుగు చరిత్ర: Part 1", {"style": "Simple"})
+    second = create_workspace(tmp_path, "తెలుగు చరిత్ర: Part 1", {"style": "Simple"})
+    other = create_workspace(tmp_path, "తెలుగు చరిత్ర: Part 1", {"style": "Story"})
+
+    assert slugify("తెలుగు చరిత్ర: Part 1") == "తెలుగు-చరిత్ర-part-1"
+    assert slugify("../") == "job"
+    assert first != second and first.is_dir() and second.is_dir()
+    assert first.name.rsplit("-", 1)[0] == second.name.rsplit("-", 1)[0]
+    assert first.name.rsplit("-", 1)[0] != other.name.rsplit("-", 1)[0]
+
+
+def test_collect_removes_old_and_oversized_but_not_locked(tmp_path: Path) -> None:
+    def workspace(name: str, size: int, age_hours: float) -> Path:
+        path = tmp_path / name
+        (path / ".lock").parent.mkdir()
+        (path / ".lock").touch()
+        (path / "video.mp4").write_bytes(b"x" * size)
+        stamp = time.time() - age_hours * 3600
+        for item in (path / ".lock", path / "video.mp4", path):
+            os.utime(item, (stamp, stamp))
+        return path
+
+    stale = workspace("stale", 10, age_hours=500)
+    older = workspace("older", 600_000, age_hours=5)
+    newer = workspace("newer", 600_000, age_hours=1)
+    running = workspace("running", 10, age_hours=900)
+    (tmp_path / "batch_manifest.json").write_text("{}")
+
+    with lock_workspace(running):
+        with pytest.raises(RuntimeError):
+            with lock_workspace(running):
+                pass
+        removed = collect_workspaces(tmp_path, max_age_hours=24, max_mb=1)
+
+    assert sorted(removed) == sorted([stale, older])
+    assert newer.exists() and running.exists()
+
+
+def test_api_startup_collects_workspaces_only_when_enabled(monkeypatch: object) -> None:
+    import asyncio
+
+    import app.main as main
+
+    collected: list[Path] = []
+    monkeypatch.setattr(main, "collect_workspaces", collected.append)
+    monkeypatch.setattr(main.job_queue, "shutdown", lambda wait: None)
+
+    async def start() -> None:
+        async with main.lifespan(main.app):
+            pass
+
+    monkeypatch.delenv("WORKSPACE_GC_ON_STARTUP", raising=False)
+    asyncio.run(start())
+    assert collected == []
+
+    monkeypatch.setenv("WORKSPACE_GC_ON_STARTUP", "1")
+    asyncio.run(start())
+    assert len(collected) == 1